@@ -0,0 +1,84 @@
+"""
+Compare turning a /objects response into the models ListHTTPReverseProxies
+needs, the original way and through egapis.ObjectSnapshot.
+
+    python benchmarks/deserialization.py --proxies 1000 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+sys.path.append(os.path.join(root, "easegress_mcp"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from easegress_mcp import egapis, schema, tools
+from fleet import make_fleet
+
+
+def original(body: bytes):
+    """response.json(), then validate every object of both kinds."""
+    items = json.loads(body)
+    http_servers = [
+        schema.HTTPServer(**item) for item in items if item.get("kind") == "HTTPServer"
+    ]
+    pipelines = [
+        schema.Pipeline(**item) for item in items if item.get("kind") == "Pipeline"
+    ]
+    return http_servers, pipelines
+
+
+def snapshot(body: bytes):
+    """The current path: the configured JSON backend, then only MCP objects."""
+    objects = egapis.ObjectSnapshot(egapis.loads(body))
+    return (
+        objects.http_servers(tools.mcp_http_server_name_prefix),
+        objects.pipelines(tools.mcp_pipeline_name_prefix),
+    )
+
+
+def serialize(models):
+    return [model.model_dump_json(exclude_none=True) for model in models]
+
+
+def best_of(repeat: int, fn, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proxies", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"JSON backend: {egapis.json_backend.__name__}")
+    print(
+        f"{'proxies':>8} {'original (s)':>13} {'snapshot (s)':>13} "
+        f"{'speedup':>8} {'dump (s)':>9}"
+    )
+    for proxies in args.proxies:
+        body = json.dumps(make_fleet(proxies)).encode()
+
+        _, original_time = best_of(args.repeat, original, body)
+        (http_servers, pipelines), snapshot_time = best_of(args.repeat, snapshot, body)
+        _, dump_time = best_of(args.repeat, serialize, http_servers + pipelines)
+
+        assert len(pipelines) == proxies
+        print(
+            f"{proxies:>8} {original_time:>13.3f} {snapshot_time:>13.3f} "
+            f"{original_time / snapshot_time:>7.1f}x {dump_time:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Synthetic Easegress object stores shaped like what the MCP tools create.
+"""
+
+
+def make_fleet(proxies: int, ports: int = 20, hosts: int = 50) -> list[dict]:
+    """
+    Return the /objects payload for `proxies` MCP reverse proxies spread
+    over `ports` HTTPServers, plus one unrelated object per proxy so the
+    store is not MCP-only.
+    """
+    objects = []
+    rules_by_port: dict[int, list[dict]] = {}
+
+    for i in range(proxies):
+        name = f"proxy{i}"
+        port = 10000 + i % ports
+        host = f"svc{i % hosts}.example.com"
+        path = f"/{name}"
+        pipeline_name = f"mcp_pipeline_{name}"
+        is_prefix = i % 2 == 0
+
+        objects.append(
+            {
+                "name": pipeline_name,
+                "kind": "Pipeline",
+                "flow": [{"filter": "mcp_proxy"}],
+                "filters": [
+                    {
+                        "kind": "Proxy",
+                        "name": "mcp_proxy",
+                        "pools": [
+                            {
+                                "servers": [
+                                    {"url": f"http://10.0.{i % 256}.{j}:8080"}
+                                    for j in range(1 + i % 3)
+                                ]
+                            }
+                        ],
+                    }
+                ],
+                "data": {
+                    "mcpHTTPReverseProxy": {
+                        "port": port,
+                        "host": host,
+                        "path": path,
+                        "isPathPrefix": is_prefix,
+                    }
+                },
+            }
+        )
+        rules_by_port.setdefault(port, []).append(
+            {
+                "host": host,
+                "paths": [
+                    {
+                        "path": "" if is_prefix else path,
+                        "pathPrefix": path if is_prefix else "",
+                        "backend": pipeline_name,
+                    }
+                ],
+            }
+        )
+        objects.append(
+            {
+                "name": f"other_pipeline_{i}",
+                "kind": "Pipeline",
+                "flow": [{"filter": "mock"}],
+                "filters": [{"kind": "Mock", "name": "mock"}],
+            }
+        )
+
+    for port, rules in rules_by_port.items():
+        objects.append(
+            {
+                "name": f"mcp_http_server_{port}",
+                "kind": "HTTPServer",
+                "port": port,
+                "rules": rules,
+            }
+        )
+
+    return objects
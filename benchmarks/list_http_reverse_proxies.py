@@ -0,0 +1,98 @@
+"""
+Compare the indexed ListHTTPReverseProxies join with the original
+pipelines x servers x rules x paths scan.
+
+    python benchmarks/list_http_reverse_proxies.py --proxies 1000 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+sys.path.append(os.path.join(root, "easegress_mcp"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from easegress_mcp import egapis, schema, tools
+from fleet import make_fleet
+
+
+def nested_loop_list(snapshot: egapis.ObjectSnapshot):
+    """The pre-index implementation, kept here as the baseline."""
+    http_servers = snapshot.http_servers()
+    pipelines = snapshot.pipelines()
+    http_reverse_proxies = []
+
+    for pipeline in pipelines:
+        if not pipeline.name.startswith(tools.mcp_pipeline_name_prefix):
+            continue
+
+        for http_server in http_servers:
+            if not http_server.name.startswith(tools.mcp_http_server_name_prefix):
+                continue
+
+            rule_host, rule_path, isPathPrefix = "", "", False
+            found = False
+            for rule in http_server.rules:
+                for path in rule.paths:
+                    if path.backend != pipeline.name:
+                        continue
+                    found = True
+                    rule_host = rule.host
+                    rule_path = path.path
+                    if len(path.pathPrefix) > 0:
+                        rule_path = path.pathPrefix
+                        isPathPrefix = True
+
+            if not found:
+                continue
+
+            http_reverse_proxies.append(
+                schema.HTTPReverseProxySchema(
+                    name=pipeline.name[len(tools.mcp_pipeline_name_prefix) :],
+                    port=http_server.port,
+                    host=rule_host,
+                    path=rule_path,
+                    isPathPrefix=isPathPrefix,
+                    endpoints=tools.pipeline_endpoints(pipeline),
+                )
+            )
+    return http_reverse_proxies
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proxies", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--ports", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'proxies':>8} {'nested (s)':>12} {'indexed (s)':>12} {'speedup':>9}")
+    for proxies in args.proxies:
+        snapshot = egapis.ObjectSnapshot(make_fleet(proxies, ports=args.ports))
+        # Build the models up front so both sides only measure the join.
+        snapshot.http_servers()
+        snapshot.pipelines()
+
+        indexed, indexed_time = timed(
+            lambda: asyncio.run(tools.list_http_reverse_proxies(snapshot=snapshot))
+        )
+        nested, nested_time = timed(lambda: nested_loop_list(snapshot))
+
+        assert len(indexed) == len(nested) == proxies
+        print(
+            f"{proxies:>8} {nested_time:>12.3f} {indexed_time:>12.3f} "
+            f"{nested_time / indexed_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
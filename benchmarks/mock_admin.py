@@ -0,0 +1,87 @@
+"""
+An in-process stand-in for the Easegress admin API objects endpoints.
+
+It serves /apis/v1/objects through an httpx.MockTransport, so the tools can
+be exercised without a running Easegress, and counts the round-trips and
+bytes every request costs.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+
+import httpx
+
+objects_path = "/apis/v1/objects"
+
+
+@dataclass
+class TrafficStats:
+    requests: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    calls: list[tuple[str, str]] = field(default_factory=list)
+
+
+class MockAdminAPI:
+    """
+    Keeps objects in a dict keyed by name and answers list, get, create,
+    update and delete like the admin API does. Every response is delayed by
+    `latency` seconds to stand in for the network and the admin server.
+    """
+
+    def __init__(self, objects: list[dict] = (), latency: float = 0.0):
+        self.latency = latency
+        self.objects: dict[str, dict] = {}
+        self.stats = TrafficStats()
+        self.load(objects)
+
+    def load(self, objects: list[dict]):
+        self.objects = {item["name"]: item for item in objects}
+
+    def reset_stats(self):
+        self.stats = TrafficStats()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = self._route(request)
+        self.stats.requests += 1
+        self.stats.bytes_sent += len(request.content)
+        self.stats.bytes_received += len(response.content)
+        self.stats.calls.append((request.method, request.url.path))
+        return response
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if not path.startswith(objects_path):
+            return httpx.Response(404, text=f"no route for {path}")
+        name = path[len(objects_path) :].strip("/")
+
+        if request.method == "GET" and not name:
+            body = json.dumps(list(self.objects.values())).encode()
+            return httpx.Response(200, content=body)
+
+        if request.method == "POST" and not name:
+            item = json.loads(request.content)
+            if item["name"] in self.objects:
+                return httpx.Response(409, text=f"{item['name']} already exists")
+            self.objects[item["name"]] = item
+            return httpx.Response(201)
+
+        if name not in self.objects:
+            return httpx.Response(404, text=f"{name} not found")
+
+        if request.method == "GET":
+            return httpx.Response(200, content=json.dumps(self.objects[name]).encode())
+        if request.method == "PUT":
+            self.objects[name] = json.loads(request.content)
+            return httpx.Response(200)
+        if request.method == "DELETE":
+            del self.objects[name]
+            return httpx.Response(200)
+        return httpx.Response(405, text=f"{request.method} not allowed")
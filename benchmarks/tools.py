@@ -0,0 +1,305 @@
+"""
+Run every MCP tool against an in-process mock of the admin API and report,
+per tool and fleet size, the wall time, admin API round-trips, bytes
+transferred and peak Python memory.
+
+    python benchmarks/tools.py --proxies 10 1000 10000 --latency 0.001
+
+With --check, the results are compared with a thresholds file and the run
+exits non-zero on any regression; --write-thresholds records the current
+results as the new thresholds. The check gates on the deterministic
+round-trips and bytes, and on peak memory with some slack. Wall time is
+too noisy to gate on by default: --check-time adds it, comparing the best
+of --repeat timed runs with the recorded time and its slack. Time and
+memory thresholds are machine dependent, regenerate them when moving the
+check to other hardware.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+sys.path.append(os.path.join(root, "easegress_mcp"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from mcp import types
+
+from easegress_mcp import client, egapis, tools
+from easegress_mcp.server import EasegressTools, serve
+import settings
+from fleet import make_fleet
+from mock_admin import MockAdminAPI
+
+default_thresholds = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+# Slack applied by --write-thresholds to the measured time and memory, with
+# floors so that sub-millisecond tools don't fail on scheduler noise.
+# Round-trips and bytes are deterministic and recorded as measured.
+time_slack, time_floor = 3.0, 0.05
+memory_slack, memory_floor = 1.5, 1.0
+
+auto_cert_manager = {
+    "name": "AutoCertManager",
+    "kind": "AutoCertManager",
+    "email": "ops@example.com",
+    "domains": [
+        {
+            "name": "*.example.com",
+            "dnsProvider": {
+                "name": "cloudflare",
+                "zone": "example.com",
+                "apiToken": "token",
+            },
+        }
+    ],
+}
+
+
+async def desired_proxies(fleet: list[dict]) -> list[dict]:
+    """
+    The fleet as ApplyHTTPReverseProxies input with one proxy dropped, one
+    retargeted and one added.
+    """
+    snapshot = egapis.ObjectSnapshot(fleet)
+    current = await tools.list_http_reverse_proxies(snapshot=snapshot)
+    proxies = [proxy.model_dump() for proxy in current[:-1]]
+    proxies[0]["endpoints"] = ["http://10.1.0.1:8080"]
+    proxies.append(
+        {
+            "name": "applied",
+            "port": 10000,
+            "path": "/applied",
+            "endpoints": ["http://10.1.0.2:8080"],
+        }
+    )
+    return proxies
+
+
+async def scenarios(fleet: list[dict]) -> dict[str, dict]:
+    """The arguments every tool is called with against `fleet`."""
+    return {
+        EasegressTools.ListHTTPReverseProxies: {},
+        EasegressTools.CreateHTTPReverseProxy: {
+            "name": "created",
+            "port": 10000,
+            "path": "/created",
+            "endpoints": ["http://10.1.0.1:8080"],
+        },
+        EasegressTools.CreateHTTPReverseProxies: {
+            "proxies": [
+                {
+                    "name": f"created{i}",
+                    "port": 10000 + i % 3,
+                    "path": f"/created{i}",
+                    "endpoints": ["http://10.1.0.1:8080"],
+                }
+                for i in range(10)
+            ]
+        },
+        EasegressTools.DeleteHTTPReverseProxy: {"name": "proxy0"},
+        EasegressTools.UpdateHTTPReverseProxy: {
+            "name": "proxy1",
+            "port": 10001,
+            "host": "svc1.example.com",
+            "path": "/proxy1",
+            "endpoints": ["http://10.1.0.1:8080"],
+        },
+        EasegressTools.GetHTTPReverseProxy: {"name": "proxy1"},
+        EasegressTools.ApplyHTTPReverseProxies: {
+            "proxies": await desired_proxies(fleet)
+        },
+        EasegressTools.OptimizeHTTPServerRoutes: {},
+        EasegressTools.ResolveRoute: {
+            "requests": [
+                {
+                    "url": f"http://svc{i % 50}.example.com:{10000 + i % 20}/proxy{i}/items"
+                }
+                for i in range(100)
+            ]
+        },
+        EasegressTools.GetHTTPServerSettings: {"port": 10001},
+        EasegressTools.UpdateHTTPServerSettings: {
+            "port": 10001,
+            "keepAlive": True,
+            "keepAliveTimeout": "75s",
+            "maxConnections": 10240,
+        },
+        EasegressTools.ApplyLetsEncrypt: {
+            "email": "ops@example.com",
+            "domainName": "*.example.com",
+            "dnsProviderZone": "example.com",
+            "dnsProviderAPIToken": "token",
+        },
+        EasegressTools.DeleteLetsEncrypt: {},
+        EasegressTools.GetLetsEncrypt: {},
+        EasegressTools.GetServerStats: {},
+    }
+
+
+async def call_tool(server, name: str, arguments: dict) -> types.CallToolResult:
+    request = types.CallToolRequest(
+        method="tools/call",
+        params=types.CallToolRequestParams(name=name, arguments=arguments),
+    )
+    result = await server.request_handlers[types.CallToolRequest](request)
+    return result.root
+
+
+async def measure(
+    server, api: MockAdminAPI, fleet: list[dict], tool, arguments, repeat: int = 1
+):
+    """
+    Run one tool on fresh copies of `fleet`: `repeat` timed runs keeping
+    the fastest, then a traced one.
+    """
+    result = {}
+    for attempt in range(repeat + 1):
+        traced = attempt == repeat
+        api.load(json.loads(json.dumps(fleet)))
+        api.reset_stats()
+        egapis.cache.clear()
+
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        response = await call_tool(server, tool, arguments)
+        elapsed = time.perf_counter() - start
+
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["peakMiB"] = peak / 2**20
+        elif "seconds" not in result or elapsed < result["seconds"]:
+            result.update(
+                seconds=elapsed,
+                roundTrips=api.stats.requests,
+                bytes=api.stats.bytes_sent + api.stats.bytes_received,
+                error=response.content[0].text if response.isError else None,
+            )
+    return result
+
+
+async def run(
+    sizes: list[int], latency: float, repeat: int = 1
+) -> dict[str, dict[str, dict]]:
+    api = MockAdminAPI(latency=latency)
+    client._async_clients[settings.EG_DEFAULT_CLUSTER] = httpx.AsyncClient(
+        transport=api.transport(),
+        limits=client.get_limits(),
+        timeout=client.get_timeout(),
+    )
+    server = await serve()
+
+    results: dict[str, dict[str, dict]] = {}
+    try:
+        for proxies in sizes:
+            fleet = make_fleet(proxies) + [auto_cert_manager]
+            tool_arguments = await scenarios(fleet)
+            missing = set(EasegressTools) - tool_arguments.keys()
+            if missing:
+                raise ValueError(f"No benchmark scenario for {sorted(missing)}")
+            for tool, arguments in tool_arguments.items():
+                results.setdefault(tool.value, {})[str(proxies)] = await measure(
+                    server, api, fleet, tool, arguments, repeat
+                )
+    finally:
+        await client.close_async_client()
+    return results
+
+
+def report(results: dict[str, dict[str, dict]]):
+    print(
+        f"{'tool':<26} {'proxies':>8} {'time (ms)':>10} {'trips':>6} "
+        f"{'KiB':>9} {'peak MiB':>9}"
+    )
+    for tool, by_size in results.items():
+        for proxies, result in by_size.items():
+            print(
+                f"{tool:<26} {proxies:>8} {result['seconds'] * 1000:>10.1f} "
+                f"{result['roundTrips']:>6} {result['bytes'] / 1024:>9.1f} "
+                f"{result['peakMiB']:>9.1f}"
+                + (f"  error: {result['error']}" if result["error"] else "")
+            )
+
+
+def check(
+    results: dict[str, dict[str, dict]], thresholds: dict, check_time: bool = False
+) -> list[str]:
+    metrics = ("roundTrips", "bytes", "peakMiB") + (("seconds",) if check_time else ())
+    failures = []
+    for tool, by_size in results.items():
+        for proxies, result in by_size.items():
+            if result["error"]:
+                failures.append(f"{tool} at {proxies}: {result['error']}")
+            limits = thresholds.get(tool, {}).get(proxies)
+            if limits is None:
+                continue
+            for metric in metrics:
+                if metric in limits and result[metric] > limits[metric]:
+                    failures.append(
+                        f"{tool} at {proxies}: {metric} {result[metric]:.4g} "
+                        f"exceeds {limits[metric]:.4g}"
+                    )
+    return failures
+
+
+def to_thresholds(results: dict[str, dict[str, dict]]) -> dict:
+    return {
+        tool: {
+            proxies: {
+                "seconds": round(max(result["seconds"] * time_slack, time_floor), 4),
+                "roundTrips": result["roundTrips"],
+                "bytes": result["bytes"],
+                "peakMiB": round(
+                    max(result["peakMiB"] * memory_slack, memory_floor), 2
+                ),
+            }
+            for proxies, result in by_size.items()
+        }
+        for tool, by_size in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proxies", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to every request"
+    )
+    parser.add_argument("--thresholds", default=default_thresholds)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument(
+        "--check-time", action="store_true", help="also gate on wall time"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="timed runs per tool, the best is kept"
+    )
+    parser.add_argument("--write-thresholds", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.proxies, args.latency, args.repeat))
+    report(results)
+
+    if args.write_thresholds:
+        with open(args.thresholds, "w") as f:
+            json.dump(to_thresholds(results), f, indent=2)
+            f.write("\n")
+
+    if args.check:
+        with open(args.thresholds) as f:
+            failures = check(results, json.load(f), args.check_time)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
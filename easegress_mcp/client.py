@@ -1,20 +1,76 @@
 import os
+from typing import Dict, Optional
+
 import httpx
 
+from easegress_mcp import clusters
+from easegress_mcp.log import logger
+import settings
+
+# One pooled client per cluster.
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+
 
 def get_header():
     return {}
 
 
-def get_async_client():
-    client = httpx.AsyncClient(headers=get_header())
-    return client
+def get_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.EG_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.EG_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.EG_HTTP_KEEPALIVE_EXPIRY,
+    )
 
 
-def get_client():
-    client = httpx.Client(headers=get_header())
-    return client
+def get_timeout(read: Optional[float] = None) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.EG_HTTP_CONNECT_TIMEOUT,
+        read=read if read is not None else settings.EG_HTTP_READ_TIMEOUT,
+        write=settings.EG_HTTP_WRITE_TIMEOUT,
+        pool=settings.EG_HTTP_POOL_TIMEOUT,
+    )
+
+
+def http2_enabled() -> bool:
+    if not settings.EG_HTTP2:
+        return False
 
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("EG_HTTP2 is set but h2 is not installed, using HTTP/1.1")
+        return False
+    return True
 
-client = get_client()
-async_client = get_async_client()
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared admin API client of the current cluster, creating it
+    on first use so its connection pool is bound to the running event loop.
+    """
+    cluster = clusters.current()
+    async_client = _async_clients.get(cluster)
+    if async_client is None or async_client.is_closed:
+        async_client = httpx.AsyncClient(
+            headers=get_header(),
+            limits=get_limits(),
+            timeout=get_timeout(),
+            http2=http2_enabled(),
+        )
+        _async_clients[cluster] = async_client
+    return async_client
+
+
+async def close_async_client():
+    async_clients = list(_async_clients.values())
+    _async_clients.clear()
+    for async_client in async_clients:
+        await async_client.aclose()
+
+
+def get_client():
+    client = httpx.Client(
+        headers=get_header(), limits=get_limits(), timeout=get_timeout()
+    )
+    return client
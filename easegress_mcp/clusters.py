@@ -0,0 +1,72 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+
+from easegress_mcp import schema
+import settings
+
+# Runs the tool on every cluster.
+all_clusters = "*"
+
+# The cluster the admin API helpers talk to. Tasks inherit it from whoever
+# creates them, so concurrent work started by a tool stays on its cluster.
+current_cluster = contextvars.ContextVar(
+    "current_cluster", default=settings.EG_DEFAULT_CLUSTER
+)
+
+
+def names() -> list[str]:
+    return list(settings.EG_CLUSTERS)
+
+
+def current() -> str:
+    return current_cluster.get()
+
+
+def address(cluster: Optional[str] = None) -> str:
+    cluster = cluster or current()
+    try:
+        return settings.EG_CLUSTERS[cluster]
+    except KeyError:
+        raise ValueError(f"Unknown cluster {cluster}, known clusters: {names()}")
+
+
+@contextmanager
+def use(cluster: str):
+    address(cluster)
+    token = current_cluster.set(cluster)
+    try:
+        yield
+    finally:
+        current_cluster.reset(token)
+
+
+async def fan_out(
+    call: Callable[[], Awaitable], timeout: Optional[float] = None
+) -> schema.ClusterResults:
+    """
+    Run `call` on every cluster concurrently. A cluster that fails or does
+    not answer within `timeout` seconds, EG_CLUSTER_TIMEOUT by default, only
+    fails its own result.
+    """
+    timeout = timeout or settings.EG_CLUSTER_TIMEOUT
+
+    async def run(cluster: str) -> schema.ClusterResult:
+        result = schema.ClusterResult(cluster=cluster)
+        start = time.perf_counter()
+        with use(cluster):
+            try:
+                result.result = await asyncio.wait_for(call(), timeout)
+                result.success = True
+            except asyncio.TimeoutError:
+                result.error = f"Timed out after {timeout}s"
+            except Exception as e:
+                result.error = str(e)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    return schema.ClusterResults(
+        items=await asyncio.gather(*[run(cluster) for cluster in names()])
+    )
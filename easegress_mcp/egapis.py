@@ -1,37 +1,311 @@
-from typing import Dict, List
-from easegress_mcp.client import async_client
+from typing import AsyncIterator, Collection, Dict, List, Optional
+from easegress_mcp import client
+from easegress_mcp import clusters
+from easegress_mcp import jsonstream
 from easegress_mcp.log import logger
+from easegress_mcp.metrics import metrics
 from easegress_mcp import schema
 from urllib.error import HTTPError
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import cache as memoize
+import gc
+import httpx
+from pydantic import TypeAdapter
+import json
+import time
 import settings
 
-urlPrefix = f"{settings.EG_API_ADDRESS}/apis/v1"
+try:
+    import orjson as json_backend
+except ImportError:
+    json_backend = json
+
+
+def url_prefix() -> str:
+    return f"{clusters.address()}/apis/v1"
+
+
+# The kind label of requests for the whole object list.
+all_kinds = "*"
+
+
+async def _send(method: str, url: str, kind: str, **kwargs) -> httpx.Response:
+    start = time.perf_counter()
+    response = None
+    try:
+        response = await client.get_async_client().request(method, url, **kwargs)
+        return response
+    finally:
+        metrics.observe_admin_request(
+            method,
+            kind,
+            time.perf_counter() - start,
+            response is None or response.status_code >= 400,
+        )
+
+
+@contextmanager
+def gc_paused():
+    """
+    Parsing and validating a large listing allocates hundreds of thousands
+    of containers, and the cyclic GC passes they trigger can take more time
+    than the work itself. None of them form cycles, so hold the GC off.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def loads(body: bytes):
+    with gc_paused():
+        return json_backend.loads(body)
+
+
+@memoize
+def list_adapter(model_class) -> TypeAdapter:
+    """
+    Validating a whole list in one call stays inside pydantic-core and is
+    about twice as fast as validating the items one by one.
+    """
+    return TypeAdapter(list[model_class])
+
+
+# Cache key of the full /objects listing.
+objects_cache_key = ("*", "objects")
+
+
+class ObjectCache:
+    """
+    Read-through cache of admin API responses keyed by (cluster, kind, name),
+    the cluster being the current one.
+
+    Values are the raw response bodies, so every hit decodes into fresh
+    objects that callers are free to modify. Entries expire after `ttl`
+    seconds and the least recently used entry is evicted once `max_size` is
+    reached. Writes made through this module invalidate the affected
+    entries; changes made by other clients are only picked up once an entry
+    expires.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, bytes]] = (
+            OrderedDict()
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, kind: str, name: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+
+        key = (clusters.current(), kind, name)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, kind: str, name: str, value: bytes):
+        if not self.enabled:
+            return
+
+        key = (clusters.current(), kind, name)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str, name: str):
+        cluster = clusters.current()
+        self._entries.pop((cluster, kind, name), None)
+        self._entries.pop((cluster, *objects_cache_key), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+        }
+
+
+cache = ObjectCache(settings.EG_CACHE_TTL, settings.EG_CACHE_MAX_SIZE)
+
+# Bumped on every write made through this module, so local views such as
+# mirror.ObjectMirror can tell that they no longer reflect our own changes.
+write_generation = 0
+
+
+def _record_write(kind: str, name: str):
+    global write_generation
+    write_generation += 1
+    cache.invalidate(kind, name)
 
 
-async def list_http_servers() -> list[schema.HTTPServer]:
-    url = f"{urlPrefix}/objects"
+async def _get_object(kind: str, name: str, use_cache: bool = True) -> dict:
+    body = cache.get(kind, name) if use_cache else None
+    if body is not None:
+        return loads(body)
+
+    url = f"{url_prefix()}/objects/{name}"
     logger.info(f"Getting {url}")
-    response = await async_client.get(url)
+    response = await _send("GET", url, kind)
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
 
-    result = [
-        schema.HTTPServer(**item)
-        for item in response.json()
-        if item.get("kind") == "HTTPServer"
-    ]
-    return result
-
-
-async def get_http_server(name: str) -> schema.HTTPServer:
-    url = f"{urlPrefix}/objects/{name}"
-    response = await async_client.get(url)
+    item = loads(response.content)
+    if item.get("kind") == kind:
+        cache.put(kind, name, response.content)
+    return item
+
+
+class ObjectSnapshot:
+    """
+    A single fetch of /objects, indexed by kind and then by name.
+
+    Models are built lazily per object, so callers only pay validation for
+    the objects they actually read.
+    """
+
+    def __init__(self, items: list[dict]):
+        self._items: Dict[str, Dict[str, dict]] = {}
+        self._models: Dict[str, Dict[str, object]] = {}
+        for item in items:
+            kind = item.get("kind")
+            name = item.get("name")
+            if not kind or not name:
+                continue
+            self._items.setdefault(kind, {})[name] = item
+
+    def _model(self, kind: str, name: str, model_class):
+        models = self._models.setdefault(kind, {})
+        model = models.get(name)
+        if model is None:
+            item = self._items.get(kind, {}).get(name)
+            if item is None:
+                return None
+            model = model_class.model_validate(item)
+            models[name] = model
+        return model
+
+    def _kind_models(self, kind: str, model_class, name_prefix: str) -> list:
+        items = self._items.get(kind, {})
+        models = self._models.setdefault(kind, {})
+        names = [name for name in items if name.startswith(name_prefix)]
+
+        missing = [name for name in names if name not in models]
+        if missing:
+            with gc_paused():
+                validated = list_adapter(model_class).validate_python(
+                    [items[name] for name in missing]
+                )
+            models.update(zip(missing, validated))
+
+        return [models[name] for name in names]
+
+    def objects(self, kind: str) -> Dict[str, dict]:
+        return self._items.get(kind, {})
+
+    def http_servers(self, name_prefix: str = "") -> list[schema.HTTPServer]:
+        return self._kind_models("HTTPServer", schema.HTTPServer, name_prefix)
+
+    def get_http_server(self, name: str) -> Optional[schema.HTTPServer]:
+        return self._model("HTTPServer", name, schema.HTTPServer)
+
+    def pipelines(self, name_prefix: str = "") -> list[schema.Pipeline]:
+        return self._kind_models("Pipeline", schema.Pipeline, name_prefix)
+
+    def get_pipeline(self, name: str) -> Optional[schema.Pipeline]:
+        return self._model("Pipeline", name, schema.Pipeline)
+
+
+async def get_object_snapshot(use_cache: bool = True) -> ObjectSnapshot:
+    body = cache.get(*objects_cache_key) if use_cache else None
+    if body is not None:
+        return ObjectSnapshot(loads(body))
+
+    url = f"{url_prefix()}/objects"
+    logger.info(f"Getting {url}")
+    response = await _send(
+        "GET",
+        url,
+        all_kinds,
+        timeout=client.get_timeout(read=settings.EG_HTTP_LIST_READ_TIMEOUT),
+    )
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
 
-    result = schema.HTTPServer(**response.json())
+    cache.put(*objects_cache_key, response.content)
+    return ObjectSnapshot(loads(response.content))
+
+
+async def iter_objects(kinds: Collection[str]) -> AsyncIterator[dict]:
+    """
+    Stream /objects and yield the objects of the given kinds one at a time.
+
+    The body is split into objects as it arrives, and objects whose bytes do
+    not even mention one of the kinds are dropped before being parsed, so
+    memory stays flat however large the object store is.
+    """
+    url = f"{url_prefix()}/objects"
+    logger.info(f"Streaming {url}")
+    markers = [f'"{kind}"'.encode() for kind in kinds]
+
+    start = time.perf_counter()
+    error = True
+    try:
+        async with client.get_async_client().stream(
+            "GET",
+            url,
+            timeout=client.get_timeout(read=settings.EG_HTTP_LIST_READ_TIMEOUT),
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise HTTPError(url, response.status_code, response.text, None, None)
+
+            splitter = jsonstream.ArraySplitter()
+            async for chunk in response.aiter_bytes():
+                for raw in splitter.feed(chunk):
+                    if not any(marker in raw for marker in markers):
+                        continue
+                    item = json_backend.loads(raw)
+                    if item.get("kind") in kinds:
+                        yield item
+            error = False
+    except GeneratorExit:
+        # The caller stopped iterating, not a failed request.
+        error = False
+        raise
+    finally:
+        # Measured until the body is consumed, or the caller stops iterating.
+        metrics.observe_admin_request(
+            "GET", ",".join(kinds), time.perf_counter() - start, error
+        )
+
+
+async def get_http_server(name: str, use_cache: bool = True) -> schema.HTTPServer:
+    result = schema.HTTPServer(**await _get_object("HTTPServer", name, use_cache))
     if result.kind != "HTTPServer":
         raise Exception(f"Object with name {name} is not an HTTPServer")
 
@@ -39,10 +313,11 @@ async def get_http_server(name: str) -> schema.HTTPServer:
 
 
 async def create_http_server(http_server: schema.HTTPServer):
-    url = f"{urlPrefix}/objects"
+    url = f"{url_prefix()}/objects"
     data = http_server.model_dump_json(exclude_none=True)
     logger.info(f"POST {url} with data: {data}")
-    response = await async_client.post(url, data=data)
+    response = await _send("POST", url, "HTTPServer", data=data)
+    _record_write("HTTPServer", http_server.name)
 
     if response.status_code != 201:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -51,13 +326,12 @@ async def create_http_server(http_server: schema.HTTPServer):
 
 
 async def update_http_server(http_server: schema.HTTPServer):
-    url = f"{urlPrefix}/objects/{http_server.name}"
+    url = f"{url_prefix()}/objects/{http_server.name}"
     data = http_server.model_dump_json(exclude_none=True)
 
-    print(f"update_http_server body: {data}")
-
     logger.info(f"PUT {url} with data: {data}")
-    response = await async_client.put(url, data=data)
+    response = await _send("PUT", url, "HTTPServer", data=data)
+    _record_write("HTTPServer", http_server.name)
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -66,9 +340,10 @@ async def update_http_server(http_server: schema.HTTPServer):
 
 
 async def delete_http_server(name: str):
-    url = f"{urlPrefix}/objects/{name}"
+    url = f"{url_prefix()}/objects/{name}"
     logger.info(f"DELETE {url}")
-    response = await async_client.delete(url)
+    response = await _send("DELETE", url, "HTTPServer")
+    _record_write("HTTPServer", name)
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -76,31 +351,8 @@ async def delete_http_server(name: str):
     logger.info(f"HTTPServer deleted successfully at {url}")
 
 
-async def list_pipelines() -> list[schema.Pipeline]:
-    url = f"{urlPrefix}/objects"
-    logger.info(f"Getting {url}")
-    response = await async_client.get(url)
-
-    if response.status_code != 200:
-        raise HTTPError(url, response.status_code, response.text, None, None)
-
-    result = [
-        schema.Pipeline(**item)
-        for item in response.json()
-        if item.get("kind") == "Pipeline"
-    ]
-    return result
-
-
-async def get_pipeline(name: str) -> schema.Pipeline:
-    url = f"{urlPrefix}/objects/{name}"
-    logger.info(f"Getting {url}")
-
-    response = await async_client.get(url)
-    if response.status_code != 200:
-        raise HTTPError(url, response.status_code, response.text, None, None)
-
-    result = schema.Pipeline(**response.json())
+async def get_pipeline(name: str, use_cache: bool = True) -> schema.Pipeline:
+    result = schema.Pipeline(**await _get_object("Pipeline", name, use_cache))
     if result.kind != "Pipeline":
         raise Exception(f"Object with name {name} is not a Pipeline")
 
@@ -108,13 +360,12 @@ async def get_pipeline(name: str) -> schema.Pipeline:
 
 
 async def create_pipeline(pipeline: schema.Pipeline):
-    url = f"{urlPrefix}/objects"
+    url = f"{url_prefix()}/objects"
     data = pipeline.model_dump_json(exclude_none=True)
 
-    print(f"create_pipeline body: {data}")
-
     logger.info(f"POST {url} with data: {data}")
-    response = await async_client.post(url, data=data)
+    response = await _send("POST", url, "Pipeline", data=data)
+    _record_write("Pipeline", pipeline.name)
 
     if response.status_code != 201:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -123,10 +374,11 @@ async def create_pipeline(pipeline: schema.Pipeline):
 
 
 async def update_pipeline(pipeline: schema.Pipeline):
-    url = f"{urlPrefix}/objects/{pipeline.name}"
+    url = f"{url_prefix()}/objects/{pipeline.name}"
     data = pipeline.model_dump_json(exclude_none=True)
     logger.info(f"PUT {url} with data: {data}")
-    response = await async_client.put(url, data=data)
+    response = await _send("PUT", url, "Pipeline", data=data)
+    _record_write("Pipeline", pipeline.name)
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -135,9 +387,10 @@ async def update_pipeline(pipeline: schema.Pipeline):
 
 
 async def delete_pipeline(name: str):
-    url = f"{urlPrefix}/objects/{name}"
+    url = f"{url_prefix()}/objects/{name}"
     logger.info(f"DELETE {url}")
-    response = await async_client.delete(url)
+    response = await _send("DELETE", url, "Pipeline")
+    _record_write("Pipeline", name)
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -146,14 +399,9 @@ async def delete_pipeline(name: str):
 
 
 async def get_auto_cert_manager() -> schema.AutoCertManager:
-    url = f"{urlPrefix}/objects/AutoCertManager"
-    logger.info(f"Getting {url}")
-    response = await async_client.get(url)
-
-    if response.status_code != 200:
-        raise HTTPError(url, response.status_code, response.text, None, None)
-
-    result = schema.AutoCertManager(**response.json())
+    result = schema.AutoCertManager(
+        **await _get_object("AutoCertManager", "AutoCertManager")
+    )
     if result.kind != "AutoCertManager":
         raise Exception("Object with name AutoCertManager is not an AutoCertManager")
 
@@ -161,10 +409,11 @@ async def get_auto_cert_manager() -> schema.AutoCertManager:
 
 
 async def create_auto_cert_manager(auto_cert_manager: schema.AutoCertManager):
-    url = f"{urlPrefix}/objects"
+    url = f"{url_prefix()}/objects"
     data = auto_cert_manager.model_dump_json(exclude_none=True)
     logger.info(f"POST {url} with data: {data}")
-    response = await async_client.post(url, data=data)
+    response = await _send("POST", url, "AutoCertManager", data=data)
+    _record_write("AutoCertManager", "AutoCertManager")
 
     if response.status_code != 201:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -175,10 +424,11 @@ async def create_auto_cert_manager(auto_cert_manager: schema.AutoCertManager):
 
 
 async def update_auto_cert_manager(auto_cert_manager: schema.AutoCertManager):
-    url = f"{urlPrefix}/objects/AutoCertManager"
+    url = f"{url_prefix()}/objects/AutoCertManager"
     data = auto_cert_manager.model_dump_json(exclude_none=True)
     logger.info(f"PUT {url} with data: {data}")
-    response = await async_client.put(url, data=data)
+    response = await _send("PUT", url, "AutoCertManager", data=data)
+    _record_write("AutoCertManager", "AutoCertManager")
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -189,9 +439,10 @@ async def update_auto_cert_manager(auto_cert_manager: schema.AutoCertManager):
 
 
 async def delete_auto_cert_manager():
-    url = f"{urlPrefix}/objects/AutoCertManager"
+    url = f"{url_prefix()}/objects/AutoCertManager"
     logger.info(f"DELETE {url}")
-    response = await async_client.delete(url)
+    response = await _send("DELETE", url, "AutoCertManager")
+    _record_write("AutoCertManager", "AutoCertManager")
 
     if response.status_code != 200:
         raise HTTPError(url, response.status_code, response.text, None, None)
@@ -0,0 +1,61 @@
+import re
+from typing import Iterator
+
+# Everything up to the next bracket outside of a string. Whole strings are
+# skipped inside the regex engine; matching stops early at the opening quote
+# of a string that is not complete yet.
+_skip = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+
+_quote, _open_brace, _open_bracket = 0x22, 0x7B, 0x5B
+
+
+class ArraySplitter:
+    """
+    Incrementally split a JSON array into the raw bytes of its elements.
+
+    Feed it the body chunk by chunk; only the element being read is kept in
+    memory, so callers can drop elements before paying for json.loads.
+    Scalars at the top level of the array are skipped, only objects and
+    arrays are yielded.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        # Offset in _buffer where scanning resumes.
+        self._pos = 0
+        # Offset in _buffer where the current element starts, -1 if none.
+        self._start = -1
+        self._depth = 0
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        self._buffer += chunk
+        buffer = self._buffer
+        pos = self._pos
+        start = self._start
+        depth = self._depth
+
+        size = len(buffer)
+        while True:
+            pos = _skip.match(buffer, pos).end()
+            if pos >= size or buffer[pos] == _quote:
+                # End of the data, or an unterminated string to complete.
+                break
+
+            char = buffer[pos]
+            if char == _open_brace or char == _open_bracket:
+                depth += 1
+                if depth == 2:
+                    start = pos
+            else:
+                depth -= 1
+                if depth == 1 and start >= 0:
+                    yield bytes(buffer[start : pos + 1])
+                    start = -1
+            pos += 1
+
+        # Drop what has been consumed and is not part of a pending element.
+        keep = start if start >= 0 else pos
+        del buffer[:keep]
+        self._start = 0 if start >= 0 else -1
+        self._pos = pos - keep
+        self._depth = depth
@@ -0,0 +1,215 @@
+import bisect
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from easegress_mcp import clusters
+from easegress_mcp import schema
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+latency_buckets = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# The tool whose call is running, so admin API requests can be attributed
+# to the workflow that caused them. Requests made outside of any tool call,
+# such as the mirror polls, are attributed to "background"; the HTTPServer
+# writes batched by mutations.py to "HTTPServerMutationQueue".
+current_tool = contextvars.ContextVar("current_tool", default="background")
+
+
+class Histogram:
+    def __init__(self, bounds: Tuple[float, ...] = latency_buckets):
+        self.bounds = bounds
+        # One count per bucket, plus the overflow bucket.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile by interpolating linearly inside the bucket
+        it falls into.
+        """
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = min(
+                    self.bounds[i] if i < len(self.bounds) else self.max, self.max
+                )
+                return lower + max(upper - lower, 0.0) * (rank - cumulative) / n
+            cumulative += n
+        return self.max
+
+    def cumulative_counts(self) -> list[Tuple[str, int]]:
+        result, cumulative = [], 0
+        for bound, n in zip(self.bounds, self.counts):
+            cumulative += n
+            result.append((repr(bound), cumulative))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class CallMetrics:
+    def __init__(self):
+        self.errors = 0
+        self.latency = Histogram()
+
+    def observe(self, seconds: float, error: bool):
+        self.latency.observe(seconds)
+        if error:
+            self.errors += 1
+
+    def to_stats(self, labels: Dict[str, str]) -> schema.CallStats:
+        latency = self.latency
+        return schema.CallStats(
+            labels=labels,
+            count=latency.count,
+            errors=self.errors,
+            totalSeconds=latency.sum,
+            meanSeconds=latency.sum / latency.count if latency.count else 0.0,
+            p50Seconds=latency.quantile(0.5),
+            p95Seconds=latency.quantile(0.95),
+            p99Seconds=latency.quantile(0.99),
+            maxSeconds=latency.max,
+        )
+
+
+tool_call_labels = ("tool",)
+admin_request_labels = ("cluster", "tool", "method", "kind")
+
+
+class Metrics:
+    """
+    In-process counters, error counts and latency histograms of tool calls
+    and of the admin API requests they make.
+
+    Admin API requests count as errors when they raise or get a status of
+    400 or more, including the 404s some tools use to detect missing
+    objects. Tool calls count as errors when they raise.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.time()
+        self.tool_calls: Dict[Tuple[str, ...], CallMetrics] = {}
+        self.admin_requests: Dict[Tuple[str, ...], CallMetrics] = {}
+
+    def observe_tool_call(self, tool: str, seconds: float, error: bool):
+        key = (tool,)
+        if key not in self.tool_calls:
+            self.tool_calls[key] = CallMetrics()
+        self.tool_calls[key].observe(seconds, error)
+
+    def observe_admin_request(
+        self, method: str, kind: str, seconds: float, error: bool
+    ):
+        key = (clusters.current(), current_tool.get(), method, kind)
+        if key not in self.admin_requests:
+            self.admin_requests[key] = CallMetrics()
+        self.admin_requests[key].observe(seconds, error)
+
+    @contextmanager
+    def tool_call(self, tool: str):
+        token = current_tool.set(tool)
+        start = time.perf_counter()
+        error = True
+        try:
+            yield
+            error = False
+        finally:
+            self.observe_tool_call(tool, time.perf_counter() - start, error)
+            current_tool.reset(token)
+
+    def stats(self, cache_stats: Dict[str, int]) -> schema.ServerStats:
+        lookups = cache_stats["hits"] + cache_stats["misses"]
+        return schema.ServerStats(
+            uptimeSeconds=time.time() - self.started_at,
+            toolCalls=[
+                value.to_stats(dict(zip(tool_call_labels, key)))
+                for key, value in sorted(self.tool_calls.items())
+            ],
+            adminRequests=[
+                value.to_stats(dict(zip(admin_request_labels, key)))
+                for key, value in sorted(self.admin_requests.items())
+            ],
+            cache=schema.CacheStats(
+                **cache_stats,
+                hitRate=cache_stats["hits"] / lookups if lookups else 0.0,
+            ),
+        )
+
+    def to_prometheus(self, cache_stats: Dict[str, int]) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        families = (
+            ("easegress_mcp_tool_calls", tool_call_labels, self.tool_calls),
+            (
+                "easegress_mcp_admin_requests",
+                admin_request_labels,
+                self.admin_requests,
+            ),
+        )
+        for name, label_names, values in families:
+            lines.append(f"# TYPE {name}_total counter")
+            for key, value in sorted(values.items()):
+                labels = format_labels(zip(label_names, key))
+                lines.append(f"{name}_total{{{labels}}} {value.latency.count}")
+            lines.append(f"# TYPE {name}_errors_total counter")
+            for key, value in sorted(values.items()):
+                labels = format_labels(zip(label_names, key))
+                lines.append(f"{name}_errors_total{{{labels}}} {value.errors}")
+            lines.append(f"# TYPE {name}_seconds histogram")
+            for key, value in sorted(values.items()):
+                labels = format_labels(zip(label_names, key))
+                for bound, count in value.latency.cumulative_counts():
+                    lines.append(
+                        f'{name}_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                    )
+                lines.append(f"{name}_seconds_sum{{{labels}}} {value.latency.sum}")
+                lines.append(f"{name}_seconds_count{{{labels}}} {value.latency.count}")
+
+        for field in ("hits", "misses"):
+            lines.append(f"# TYPE easegress_mcp_cache_{field}_total counter")
+            lines.append(f"easegress_mcp_cache_{field}_total {cache_stats[field]}")
+        lines.append("# TYPE easegress_mcp_cache_entries gauge")
+        lines.append(f"easegress_mcp_cache_entries {cache_stats['size']}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels) -> str:
+    return ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in labels
+    )
+
+
+metrics = Metrics()
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from easegress_mcp import clusters
+from easegress_mcp import egapis
+from easegress_mcp.log import logger
+import settings
+
+mirrored_kinds = ("HTTPServer", "Pipeline", "AutoCertManager")
+
+
+class ObjectChangeType(str, Enum):
+    added = "added"
+    modified = "modified"
+    deleted = "deleted"
+
+
+class ObjectChangeEvent(BaseModel):
+    type: ObjectChangeType
+    kind: str
+    name: str
+    # The new object, None when it was deleted.
+    object: Optional[dict] = None
+
+
+ChangeSubscriber = Callable[[list[ObjectChangeEvent]], None]
+
+
+class ObjectMirror:
+    """
+    In-memory mirror of the mirrored kinds of the default cluster, kept up
+    to date by polling /objects in a background task.
+
+    Each poll is diffed against the previous one and the resulting change
+    events are published to subscribers. The mirror counts as stale once it
+    is older than `max_staleness` seconds or this process has written to the
+    admin API since the last sync.
+    """
+
+    def __init__(self, interval: float, max_staleness: float):
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._objects: Dict[str, Dict[str, dict]] = {
+            kind: {} for kind in mirrored_kinds
+        }
+        self._snapshot: Optional[egapis.ObjectSnapshot] = None
+        self._synced_at: Optional[float] = None
+        self._synced_generation = -1
+        self._subscribers: list[ChangeSubscriber] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and self._synced_generation == egapis.write_generation
+            and time.monotonic() - self._synced_at <= self.max_staleness
+        )
+
+    def subscribe(self, subscriber: ChangeSubscriber):
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: ChangeSubscriber):
+        self._subscribers.remove(subscriber)
+
+    async def snapshot(self, refresh: bool = False) -> egapis.ObjectSnapshot:
+        """
+        Return the mirrored objects, syncing first if they are stale or a
+        refresh is forced.
+        """
+        if not refresh and self.is_fresh():
+            return self._snapshot
+
+        async with self._lock:
+            if refresh or not self.is_fresh():
+                await self._sync()
+        return self._snapshot
+
+    async def _sync(self):
+        generation = egapis.write_generation
+        # Streamed, so the objects of other kinds are never held in memory.
+        objects: Dict[str, Dict[str, dict]] = {kind: {} for kind in mirrored_kinds}
+        with clusters.use(settings.EG_DEFAULT_CLUSTER):
+            async for item in egapis.iter_objects(mirrored_kinds):
+                if item.get("name"):
+                    objects[item["kind"]][item["name"]] = item
+
+        events = []
+        for kind in mirrored_kinds:
+            old = self._objects[kind]
+            new = objects[kind]
+            for name, item in new.items():
+                if name not in old:
+                    events.append(
+                        ObjectChangeEvent(
+                            type=ObjectChangeType.added,
+                            kind=kind,
+                            name=name,
+                            object=item,
+                        )
+                    )
+                elif old[name] != item:
+                    events.append(
+                        ObjectChangeEvent(
+                            type=ObjectChangeType.modified,
+                            kind=kind,
+                            name=name,
+                            object=item,
+                        )
+                    )
+            for name in old.keys() - new.keys():
+                events.append(
+                    ObjectChangeEvent(
+                        type=ObjectChangeType.deleted, kind=kind, name=name
+                    )
+                )
+
+        self._objects = objects
+        if events or self._snapshot is None:
+            self._snapshot = egapis.ObjectSnapshot(
+                [item for items in objects.values() for item in items.values()]
+            )
+        self._synced_at = time.monotonic()
+        self._synced_generation = generation
+
+        if events:
+            logger.info(f"Mirror synced with {len(events)} changes")
+            self._publish(events)
+
+    def _publish(self, events: list[ObjectChangeEvent]):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber(events)
+            except Exception:
+                logger.exception("Mirror subscriber failed")
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._lock:
+                    await self._sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Mirror sync failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+mirror = ObjectMirror(settings.EG_MIRROR_INTERVAL, settings.EG_MIRROR_MAX_STALENESS)
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Callable, Optional
+from urllib.error import HTTPError
+
+from easegress_mcp import egapis
+from easegress_mcp import metrics
+from easegress_mcp import schema
+from easegress_mcp.log import logger
+import settings
+
+# Edits the rules of an HTTPServer in place. A mutation may return False to
+# tell that it left the server unchanged.
+Mutation = Callable[[schema.HTTPServer], Optional[bool]]
+
+# The tool label of the admin API requests made by the queues, which batch
+# the mutations of several tool calls.
+queue_tool_label = "HTTPServerMutationQueue"
+
+
+class HTTPServerMutationQueue:
+    """
+    Serializes and batches the read-modify-write cycles of one HTTPServer.
+
+    Mutations submitted within `window` seconds of each other are applied
+    together with a single GET and a single write: a PUT, a POST when the
+    server does not exist yet, or a DELETE when no rule is left. Every
+    submitter waits for the write carrying its mutation. Only one batch per
+    server is in flight at a time, so concurrent callers can't lose each
+    other's updates. Nothing is written when every mutation of a batch
+    reports that it changed nothing.
+    """
+
+    def __init__(self, name: str, port: int, window: float):
+        self.name = name
+        self.port = port
+        self.window = window
+        self._pending: list[tuple[Mutation, asyncio.Future]] = []
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, mutation: Mutation):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((mutation, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        await future
+
+    async def _run(self):
+        # The worker runs in a copy of the first submitter's context, which
+        # keeps its cluster but would credit it with every batched write.
+        metrics.current_tool.set(queue_tool_label)
+        while self._pending:
+            await asyncio.sleep(self.window)
+            batch, self._pending = self._pending, []
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _apply(self, batch: list[tuple[Mutation, asyncio.Future]]):
+        try:
+            http_server = await egapis.get_http_server(self.name, use_cache=False)
+            exists = True
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+            defaults = schema.HTTPServerSettings(**settings.EG_HTTP_SERVER_SETTINGS)
+            http_server = schema.HTTPServer(
+                name=self.name,
+                kind="HTTPServer",
+                port=self.port,
+                rules=[],
+                **defaults.model_dump(mode="json", exclude_none=True),
+            )
+            exists = False
+
+        applied = []
+        changed = False
+        for mutation, future in batch:
+            if future.done():
+                # The submitter gave up waiting.
+                continue
+            try:
+                changed = mutation(http_server) is not False or changed
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            applied.append(future)
+
+        if not changed:
+            for future in applied:
+                future.set_result(None)
+            return
+
+        if len(http_server.rules) == 0:
+            if exists:
+                logger.info(f"HTTP server {http_server.name} has no rules, deleting it")
+                await egapis.delete_http_server(http_server.name)
+        elif exists:
+            await egapis.update_http_server(http_server)
+        else:
+            await egapis.create_http_server(http_server)
+
+        logger.info(f"Applied {len(applied)} mutations to HTTPServer {self.name}")
+        for future in applied:
+            if not future.done():
+                future.set_result(None)
@@ -0,0 +1,81 @@
+import cProfile
+import itertools
+import os
+import re
+import time
+from typing import Awaitable, TypeVar
+
+from easegress_mcp.log import logger
+import settings
+
+T = TypeVar("T")
+
+
+class ToolProfiler:
+    """
+    Captures cProfile stats of sampled tool calls into `directory`, one
+    file per call named after the tool and its duration, e.g.
+    20250101-120000-7_ListHTTPReverseProxies_1532ms_slow.prof. Open them
+    with pstats or snakeviz.
+
+    The profiler runs for the whole call, awaits included, so it also
+    records whatever other tasks the event loop runs meanwhile. Only one
+    call is profiled at a time; calls arriving while a profile is being
+    taken are not profiled.
+    """
+
+    def __init__(self, directory: str, sample_rate: int, slow_seconds: float):
+        self.directory = directory
+        self.sample_rate = max(sample_rate, 1)
+        self.slow_seconds = slow_seconds
+        self._calls = itertools.count()
+        self._saved = itertools.count()
+        self._active = False
+
+    def should_profile(self, forced: bool) -> bool:
+        if self._active:
+            return False
+        return forced or next(self._calls) % self.sample_rate == 0
+
+    async def run(self, tool: str, aw: Awaitable[T]) -> T:
+        profile = cProfile.Profile()
+        self._active = True
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return await aw
+        finally:
+            profile.disable()
+            self._active = False
+            self._save(tool, profile, time.perf_counter() - start)
+
+    def _save(self, tool: str, profile: cProfile.Profile, duration: float):
+        slow = duration >= self.slow_seconds
+        file_name = "{}-{}_{}_{}ms{}.prof".format(
+            time.strftime("%Y%m%d-%H%M%S"),
+            next(self._saved),
+            re.sub(r"[^\w.-]", "_", tool),
+            round(duration * 1000),
+            "_slow" if slow else "",
+        )
+        path = os.path.join(self.directory, file_name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError:
+            logger.exception(f"Failed to save the profile of {tool}")
+            return
+
+        if slow:
+            logger.warning(
+                f"Slow tool call {tool} took {duration:.3f}s, profile saved to {path}"
+            )
+        else:
+            logger.info(f"Tool call {tool} took {duration:.3f}s, profiled to {path}")
+
+
+profiler = ToolProfiler(
+    settings.EG_PROFILE_DIR,
+    settings.EG_PROFILE_SAMPLE_RATE,
+    settings.EG_PROFILE_SLOW_SECONDS,
+)
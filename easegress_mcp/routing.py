@@ -0,0 +1,283 @@
+import re
+from typing import Optional
+
+from easegress_mcp import schema
+
+
+def is_plain(rule: schema.Rule) -> bool:
+    """Whether the rule matches on its host alone."""
+    return rule.ipFilter is None and not rule.hostRegexp and not rule.hosts
+
+
+def is_regexp(path: schema.Path) -> bool:
+    return not path.path and not path.pathPrefix and bool(path.pathRegexp)
+
+
+def path_specificity(path: schema.Path) -> tuple:
+    """
+    Sort key putting the paths that match fewer requests first: exact paths,
+    then prefixes from the longest, then paths matching everything. Among
+    paths that match the same URLs, the ones with extra conditions come
+    first.
+    """
+    if path.path:
+        rank, length = 0, len(path.path)
+    elif path.pathPrefix:
+        rank, length = 1, len(path.pathPrefix)
+    else:
+        rank, length = 2, 0
+    constrained = bool(path.methods or path.headers or path.queries or path.ipFilter)
+    return rank, -length, not constrained
+
+
+def sort_paths(paths: list[schema.Path]) -> list[schema.Path]:
+    """
+    Sort paths by specificity between regexp paths, which stay in place:
+    whether a regexp matches more or fewer requests than a prefix can't be
+    told, so no path is moved across one.
+    """
+    result: list[schema.Path] = []
+    run: list[schema.Path] = []
+    for path in paths:
+        if is_regexp(path):
+            result.extend(sorted(run, key=path_specificity))
+            result.append(path)
+            run = []
+        else:
+            run.append(path)
+    result.extend(sorted(run, key=path_specificity))
+    return result
+
+
+def merge_plain_rules(rules: list[schema.Rule]) -> list[schema.Rule]:
+    """
+    Merge a run of plain rules by host, keeping the order of the first rule
+    of each host, except the catch-all empty host which goes last, behind
+    the hosts it would otherwise shadow. The paths of merged rules are
+    concatenated in rule order, which is the order the router checks them
+    in, then sorted with sort_paths.
+    """
+    by_host: dict[str, schema.Rule] = {}
+    for rule in rules:
+        merged = by_host.get(rule.host)
+        if merged is None:
+            by_host[rule.host] = schema.Rule(host=rule.host, paths=list(rule.paths))
+        else:
+            merged.paths.extend(rule.paths)
+
+    catch_all = by_host.pop("", None)
+    plain = list(by_host.values()) + ([catch_all] if catch_all else [])
+    for rule in plain:
+        rule.paths = sort_paths(rule.paths)
+    return [rule for rule in plain if rule.paths]
+
+
+def optimize_rules(rules: list[schema.Rule]) -> list[schema.Rule]:
+    """
+    Merge the plain rules sharing a host into one rule and sort the paths of
+    every rule by specificity, so the ordered router neither scans one rule
+    per route nor lets a short prefix shadow longer ones.
+
+    Rules with conditions besides the host stay where they are, with their
+    paths sorted: whether they match a request a plain rule matches can't
+    always be told, so no plain rule is moved across one. Only the runs of
+    plain rules between them are merged, see merge_plain_rules. Sorting is
+    stable, so paths that are equally specific keep their relative order
+    and the same one keeps winning.
+    """
+    result: list[schema.Rule] = []
+    run: list[schema.Rule] = []
+    for rule in rules:
+        if is_plain(rule):
+            run.append(rule)
+            continue
+        result.extend(merge_plain_rules(run))
+        run = []
+        rule.paths = sort_paths(rule.paths)
+        result.append(rule)
+    result.extend(merge_plain_rules(run))
+    return result
+
+
+def optimize_http_server(http_server: schema.HTTPServer) -> bool:
+    """Optimize the rules of the server, returning whether they changed."""
+    rules = optimize_rules([rule.model_copy() for rule in http_server.rules])
+    if rules == http_server.rules:
+        return False
+    http_server.rules = rules
+    return True
+
+
+# Stands in for patterns Python can't compile, matching nothing.
+_never = re.compile(r"(?!)")
+
+
+def compile_regexp(pattern: str) -> re.Pattern:
+    """Compile an Easegress (Go RE2) pattern, most of which Python accepts."""
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return _never
+
+
+class RouteEntry:
+    """One path of one rule, with its rank in the router's scan order."""
+
+    __slots__ = ("order", "server", "rule", "path", "regexp")
+
+    def __init__(
+        self,
+        order: tuple[int, int, int],
+        server: schema.HTTPServer,
+        rule: schema.Rule,
+        path: schema.Path,
+    ):
+        self.order = order
+        self.server = server
+        self.rule = rule
+        self.path = path
+        self.regexp = compile_regexp(path.pathRegexp) if path.pathRegexp else None
+
+    def matches_method(self, method: Optional[str]) -> bool:
+        return method is None or not self.path.methods or method in self.path.methods
+
+
+class _TrieNode:
+    __slots__ = ("children", "prefixes", "exact")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.prefixes: list[RouteEntry] = []
+        self.exact: list[RouteEntry] = []
+
+
+class PathTrie:
+    """
+    Character trie of the exact paths and path prefixes of a set of rules,
+    so matching a path costs one step per character instead of one check
+    per route. Regexp paths are checked one by one.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._regexps: list[RouteEntry] = []
+
+    def _node(self, key: str) -> _TrieNode:
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        return node
+
+    def add(self, entry: RouteEntry):
+        path = entry.path
+        if path.path:
+            self._node(path.path).exact.append(entry)
+        elif path.pathPrefix:
+            self._node(path.pathPrefix).prefixes.append(entry)
+        elif entry.regexp is not None:
+            self._regexps.append(entry)
+        else:
+            # No path condition at all matches every path.
+            self._root.prefixes.append(entry)
+
+    def match(self, path: str) -> list[RouteEntry]:
+        node = self._root
+        matches = list(node.prefixes)
+        for char in path:
+            node = node.children.get(char)
+            if node is None:
+                break
+            matches.extend(node.prefixes)
+        else:
+            matches.extend(node.exact)
+        matches.extend(entry for entry in self._regexps if entry.regexp.search(path))
+        return matches
+
+
+class _HostMatcher:
+    """The host conditions of a rule that is not plain."""
+
+    def __init__(self, rule: schema.Rule):
+        self.hosts = {rule.host.lower()} if rule.host else set()
+        self.regexps = [compile_regexp(rule.hostRegexp)] if rule.hostRegexp else []
+        for host in rule.hosts or []:
+            if host.isRegexp:
+                self.regexps.append(compile_regexp(host.value))
+            else:
+                self.hosts.add(host.value.lower())
+
+    def match(self, host: str) -> bool:
+        if not self.hosts and not self.regexps:
+            return True
+        return host in self.hosts or any(regexp.search(host) for regexp in self.regexps)
+
+
+class PortRoutes:
+    def __init__(self):
+        # Plain rules by host, "" being the rules that match any host.
+        self.hosts: dict[str, PathTrie] = {}
+        # Rules with other conditions, checked one by one.
+        self.others: list[tuple[_HostMatcher, PathTrie]] = []
+
+    def match(
+        self, host: str, path: str, method: Optional[str] = None
+    ) -> list[RouteEntry]:
+        """Every route matching the request, the one serving it first."""
+        matches = []
+        for trie_host in (host, "") if host else ("",):
+            trie = self.hosts.get(trie_host)
+            if trie is not None:
+                matches.extend(trie.match(path))
+        for host_matcher, trie in self.others:
+            if host_matcher.match(host):
+                matches.extend(trie.match(path))
+        matches = [entry for entry in matches if entry.matches_method(method)]
+        matches.sort(key=lambda entry: entry.order)
+        return matches
+
+
+class RouteIndex:
+    """
+    Index of the rules of HTTPServers by port and host, resolving requests
+    the way the Easegress ordered router does: rules are scanned in order,
+    paths within a rule in order, and the first path matching both the host
+    and the path serves the request. IP filters, headers and queries are
+    not evaluated, such paths are assumed to match.
+
+    Servers using another router, such as RadixTree, are resolved the same
+    way; `router_kinds` records them by port so callers can flag the result.
+    """
+
+    def __init__(self, http_servers: list[schema.HTTPServer]):
+        self.ports: dict[int, PortRoutes] = {}
+        self.router_kinds: dict[int, str] = {}
+        for server_index, http_server in enumerate(http_servers):
+            port_routes = self.ports.setdefault(http_server.port, PortRoutes())
+            ordered = schema.RouterKindEnum.Ordered.value
+            if (http_server.routerKind or ordered) != ordered:
+                self.router_kinds[http_server.port] = http_server.routerKind
+            for rule_index, rule in enumerate(http_server.rules):
+                if is_plain(rule):
+                    host = rule.host.lower()
+                    if host not in port_routes.hosts:
+                        port_routes.hosts[host] = PathTrie()
+                    trie = port_routes.hosts[host]
+                else:
+                    trie = PathTrie()
+                    port_routes.others.append((_HostMatcher(rule), trie))
+                for path_index, path in enumerate(rule.paths):
+                    order = (server_index, rule_index, path_index)
+                    trie.add(RouteEntry(order, http_server, rule, path))
+
+    def match(
+        self, port: int, host: str, path: str, method: Optional[str] = None
+    ) -> list[RouteEntry]:
+        port_routes = self.ports.get(port)
+        if port_routes is None:
+            return []
+        # The Host header may carry a port.
+        host = host.lower().rsplit(":", 1)[0] if ":" in host else host.lower()
+        return port_routes.match(host, path, method)
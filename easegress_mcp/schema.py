@@ -1,5 +1,5 @@
-from typing import Optional, Dict
-from pydantic import BaseModel
+from typing import Any, Optional, Dict
+from pydantic import BaseModel, Field, model_validator
 from enum import Enum
 
 
@@ -89,16 +89,73 @@ class PipelineFilter(BaseModel):
     name: str
 
 
+# Go durations, such as 500ms or 1m30s.
+duration_pattern = r"^([0-9]+(\.[0-9]+)?(ns|us|µs|ms|s|m|h))+$"
+
+
+class LoadBalancePolicyEnum(str, Enum):
+    roundRobin = "roundRobin"
+    random = "random"
+    weightedRandom = "weightedRandom"
+    ipHash = "ipHash"
+    headerHash = "headerHash"
+
+
+class BackOffPolicyEnum(str, Enum):
+    random = "random"
+    exponential = "exponential"
+
+
 class PoolServer(BaseModel):
     url: str
+    weight: Optional[int] = None
+
+
+class LoadBalance(BaseModel):
+    policy: LoadBalancePolicyEnum = LoadBalancePolicyEnum.roundRobin
+    headerHashKey: Optional[str] = None
+
+
+class MemoryCache(BaseModel):
+    # Responses are cached by host, method, path and query, the key isn't
+    # configurable in Easegress. Only the responses to these methods with
+    # these status codes are cached.
+    expiration: str = Field(default="10s", pattern=duration_pattern)
+    # Larger responses aren't cached.
+    maxEntryBytes: int = Field(default=4096, ge=1)
+    codes: list[int] = Field(default=[200], min_length=1)
+    methods: list[str] = Field(default=["GET", "HEAD"], min_length=1)
+
+
+class Compression(BaseModel):
+    # Responses shorter than this many bytes are sent uncompressed.
+    minLength: int = Field(default=1024, ge=0)
 
 
 class ProxyPool(BaseModel):
     servers: list[PoolServer]
+    loadBalance: Optional[LoadBalance] = None
+    timeout: Optional[str] = None
+    # Name of a Retry policy in the resilience of the pipeline.
+    retryPolicy: Optional[str] = None
+    # Upstream status codes counting as failures.
+    failureCodes: Optional[list[int]] = None
+    memoryCache: Optional[MemoryCache] = None
 
 
 class ProxyFilter(PipelineFilter):
     pools: list[ProxyPool]
+    maxIdleConns: Optional[int] = None
+    maxIdleConnsPerHost: Optional[int] = None
+    compression: Optional[Compression] = None
+
+
+class RetryPolicy(BaseModel):
+    name: str
+    kind: str = "Retry"
+    maxAttempts: Optional[int] = None
+    waitDuration: Optional[str] = None
+    backOffPolicy: Optional[BackOffPolicyEnum] = None
 
 
 class Pipeline(BaseModel):
@@ -106,6 +163,9 @@ class Pipeline(BaseModel):
     kind: str = "Pipeline"
     flow: list[PipelineFlowNode] = []
     filters: list[dict] = []
+    resilience: Optional[list[dict]] = None
+    # Static user data, MCP keeps the proxy route here.
+    data: Optional[dict] = None
 
 
 # Use common simplest fields for the time being
@@ -146,6 +206,14 @@ class LetsEncryptSchema(BaseModel):
     dnsProviderAPIToken: str = ""
 
 
+class ProxyRetrySchema(BaseModel):
+    # Attempts in total, the first one included. Every attempt picks an
+    # endpoint anew, so retries fail over to the other endpoints.
+    maxAttempts: int = Field(default=3, ge=1)
+    waitDuration: Optional[str] = Field(default=None, pattern=duration_pattern)
+    backOffPolicy: Optional[BackOffPolicyEnum] = None
+
+
 class HTTPReverseProxySchema(BaseModel):
     name: str = "default_proxy"
     port: int = 80
@@ -154,3 +222,287 @@ class HTTPReverseProxySchema(BaseModel):
     path: str = "/"
     isPathPrefix: bool = False
     endpoints: list[str] = []
+
+    # Upstream tuning, Easegress defaults when unset.
+    loadBalance: Optional[LoadBalancePolicyEnum] = None
+    # The request header hashed by the headerHash policy.
+    headerHashKey: Optional[str] = None
+    # Weight of each endpoint by URL, used by the weightedRandom policy.
+    weights: Optional[Dict[str, int]] = None
+    timeout: Optional[str] = Field(default=None, pattern=duration_pattern)
+    maxIdleConns: Optional[int] = Field(default=None, ge=0)
+    maxIdleConnsPerHost: Optional[int] = Field(default=None, ge=0)
+    retry: Optional[ProxyRetrySchema] = None
+    # Upstream status codes counting as failures, retried when retry is set.
+    failureCodes: Optional[list[int]] = None
+    # Serve repeated requests from memory instead of the endpoints.
+    cache: Optional[MemoryCache] = None
+    # Gzip responses to the clients accepting it.
+    compression: Optional[Compression] = None
+
+    @model_validator(mode="after")
+    def check_upstream(self):
+        header_hash = self.loadBalance == LoadBalancePolicyEnum.headerHash
+        if header_hash and not self.headerHashKey:
+            raise ValueError("headerHashKey is required by the headerHash policy")
+        if self.headerHashKey is not None and not header_hash:
+            raise ValueError("headerHashKey is only used by the headerHash policy")
+        unknown = set(self.weights or {}) - set(self.endpoints)
+        if unknown:
+            raise ValueError(f"Weights of unknown endpoints {sorted(unknown)}")
+        return self
+
+
+class ListHTTPReverseProxiesSchema(BaseModel):
+    # Bypass the object cache and mirror and read from the admin API.
+    refresh: bool = False
+
+    # Filters, all optional and combined with AND.
+    port: Optional[int] = None
+    hostPrefix: Optional[str] = None
+    pathPrefix: Optional[str] = None
+    endpointContains: Optional[str] = None
+
+    # Page size, and the nextCursor of the previous page.
+    limit: Optional[int] = Field(default=None, ge=1)
+    cursor: Optional[str] = None
+
+
+class GetHTTPReverseProxySchema(NameSchema):
+    refresh: bool = False
+
+
+class HTTPReverseProxiesSchema(BaseModel):
+    proxies: list[HTTPReverseProxySchema] = []
+
+
+class HTTPReverseProxyResult(BaseModel):
+    name: str
+    success: bool = False
+    error: Optional[str] = None
+
+
+class HTTPReverseProxyPage(BaseModel):
+    items: list[HTTPReverseProxySchema] = []
+    # Pass as cursor to get the next page, None on the last page.
+    nextCursor: Optional[str] = None
+    # The proxies skipped because their settings can't be read.
+    errors: Optional[list[str]] = None
+
+
+class OutputOptions(BaseModel):
+    class FormatEnum(str, Enum):
+        # A single compact JSON document.
+        json = "json"
+        # One compact JSON document per line, one line per list element.
+        ndjson = "ndjson"
+        # One text content per list element.
+        items = "items"
+
+    format: Optional[FormatEnum] = None
+    # Only keep these fields of each returned object, e.g. name,port,endpoints.
+    fields: Optional[list[str]] = None
+    excludeNone: Optional[bool] = None
+    excludeDefaults: Optional[bool] = None
+
+
+class ApplyHTTPReverseProxiesSchema(BaseModel):
+    # The full desired set of proxies.
+    proxies: list[HTTPReverseProxySchema]
+    # Delete existing proxies missing from proxies.
+    prune: bool = True
+    # Required to prune with an empty proxies, which deletes every proxy.
+    confirmDeleteAll: bool = False
+    # Only compute the plan.
+    dryRun: bool = False
+
+
+class HTTPReverseProxyPlanAction(str, Enum):
+    create = "create"
+    # The endpoints or the upstream tuning changed.
+    updateEndpoints = "updateEndpoints"
+    # The route changed, or the pipeline has none yet.
+    moveRoute = "moveRoute"
+    delete = "delete"
+
+
+class HTTPReverseProxyPlanItem(BaseModel):
+    name: str
+    action: HTTPReverseProxyPlanAction
+    # None when deleting a pipeline that nothing routes to.
+    port: Optional[int] = None
+    # The port the route leaves, for moveRoute across ports.
+    fromPort: Optional[int] = None
+    # Set once the plan is executed.
+    success: Optional[bool] = None
+    error: Optional[str] = None
+
+
+class HTTPReverseProxyPlan(BaseModel):
+    dryRun: bool = False
+    items: list[HTTPReverseProxyPlanItem] = []
+    # Admin API calls the execution takes, besides reading the current state.
+    apiCalls: int = 0
+    # The proxies whose settings can't be read. They are rewritten when
+    # desired and deleted when pruned, like any other.
+    errors: Optional[list[str]] = None
+
+
+class OptimizeHTTPServerRoutesSchema(BaseModel):
+    # Only the HTTPServer of this port, every MCP-managed one by default.
+    port: Optional[int] = None
+    # Only report what would change.
+    dryRun: bool = False
+
+
+class HTTPServerRoutesResult(BaseModel):
+    name: str
+    port: int
+    rulesBefore: int = 0
+    rulesAfter: int = 0
+    changed: bool = False
+    success: bool = False
+    error: Optional[str] = None
+
+
+class OptimizeHTTPServerRoutesResult(BaseModel):
+    dryRun: bool = False
+    items: list[HTTPServerRoutesResult] = []
+
+
+class RouterKindEnum(str, Enum):
+    Ordered = "Ordered"
+    RadixTree = "RadixTree"
+
+
+class HTTPServerSettings(BaseModel):
+    """The performance settings of an HTTPServer, unset ones left as they are."""
+
+    keepAlive: Optional[bool] = None
+    keepAliveTimeout: Optional[str] = Field(default=None, pattern=duration_pattern)
+    maxConnections: Optional[int] = Field(default=None, ge=1)
+    # Entries of the route cache.
+    cacheSize: Optional[int] = Field(default=None, ge=0)
+    http3: Optional[bool] = None
+    routerKind: Optional[RouterKindEnum] = None
+    # Bytes, -1 for no limit.
+    clientMaxBodySize: Optional[int] = Field(default=None, ge=-1)
+
+
+class GetHTTPServerSettingsSchema(BaseModel):
+    port: int
+    refresh: bool = False
+
+
+class UpdateHTTPServerSettingsSchema(HTTPServerSettings):
+    port: int
+
+
+class HTTPServerSettingsResult(HTTPServerSettings):
+    name: str
+    port: int
+    # The settings the update changed.
+    changed: Optional[list[str]] = None
+
+
+class RouteRequest(BaseModel):
+    # A full URL such as http://api.example.com:8080/v1/users, or the parts
+    # below.
+    url: Optional[str] = None
+    port: Optional[int] = None
+    host: str = ""
+    path: str = "/"
+    method: Optional[str] = None
+
+
+class ResolveRouteSchema(BaseModel):
+    requests: list[RouteRequest] = []
+    # Bypass the object cache and mirror and read from the admin API.
+    refresh: bool = False
+
+
+class RouteMatch(BaseModel):
+    # The HTTPServer and rule host of the route.
+    server: str
+    host: str = ""
+    path: str = ""
+    pathPrefix: str = ""
+    pathRegexp: Optional[str] = None
+    backend: str
+    # The MCP reverse proxy owning the backend, if any.
+    proxy: Optional[str] = None
+    # Set on shadowed routes matching the same host and path as the winner.
+    conflict: bool = False
+
+
+class RouteResolution(BaseModel):
+    port: Optional[int] = None
+    host: str = ""
+    path: str = ""
+    method: Optional[str] = None
+    # The route serving the request, None when no route matches.
+    route: Optional[RouteMatch] = None
+    endpoints: list[str] = []
+    # Routes matching the request too, in the order the router sees them.
+    shadowed: list[RouteMatch] = []
+    # Caveats about the resolution, such as a router it does not model.
+    note: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ResolveRouteResult(BaseModel):
+    items: list[RouteResolution] = []
+
+
+class GetServerStatsSchema(BaseModel):
+    # Named apart from OutputOptions.FormatEnum, tool schemas share $defs.
+    class StatsFormatEnum(str, Enum):
+        json = "json"
+        # Prometheus text exposition format.
+        prometheus = "prometheus"
+
+    format: StatsFormatEnum = StatsFormatEnum.json
+    # Start counting from zero again after reading.
+    reset: bool = False
+
+
+class CallStats(BaseModel):
+    labels: Dict[str, str] = {}
+    count: int = 0
+    errors: int = 0
+    totalSeconds: float = 0.0
+    meanSeconds: float = 0.0
+    # Estimated from the latency histogram buckets.
+    p50Seconds: float = 0.0
+    p95Seconds: float = 0.0
+    p99Seconds: float = 0.0
+    maxSeconds: float = 0.0
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    hitRate: float = 0.0
+    size: int = 0
+    maxSize: int = 0
+
+
+class ServerStats(BaseModel):
+    uptimeSeconds: float = 0.0
+    toolCalls: list[CallStats] = []
+    # Broken down by the tool that made them, method and object kind.
+    adminRequests: list[CallStats] = []
+    cache: CacheStats = CacheStats()
+
+
+class ClusterResult(BaseModel):
+    cluster: str
+    success: bool = False
+    error: Optional[str] = None
+    seconds: float = 0.0
+    # What the tool returns on a single cluster.
+    result: Any = None
+
+
+class ClusterResults(BaseModel):
+    items: list[ClusterResult] = []
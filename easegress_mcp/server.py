@@ -1,112 +1,259 @@
 import asyncio
 from enum import Enum
-from typing import List
+from typing import List, Optional
+from weakref import WeakKeyDictionary
 
 from mcp.server import Server
 from mcp.types import TextContent, Tool
 from mcp.server.stdio import stdio_server
 
+from easegress_mcp import client
+from easegress_mcp import clusters
 from easegress_mcp import tools
 from easegress_mcp import utils
 from easegress_mcp import schema
 from easegress_mcp.log import logger
+from easegress_mcp.metrics import metrics
+from easegress_mcp.mirror import mirror
+from easegress_mcp.profiling import profiler
+import settings
 
 
 class EasegressTools(str, Enum):
     ListHTTPReverseProxies = "ListHTTPReverseProxies"
     CreateHTTPReverseProxy = "CreateHTTPReverseProxy"
+    CreateHTTPReverseProxies = "CreateHTTPReverseProxies"
     DeleteHTTPReverseProxy = "DeleteHTTPReverseProxy"
     UpdateHTTPReverseProxy = "UpdateHTTPReverseProxy"
     GetHTTPReverseProxy = "GetHTTPReverseProxy"
+    ApplyHTTPReverseProxies = "ApplyHTTPReverseProxies"
+    OptimizeHTTPServerRoutes = "OptimizeHTTPServerRoutes"
+    ResolveRoute = "ResolveRoute"
+    GetHTTPServerSettings = "GetHTTPServerSettings"
+    UpdateHTTPServerSettings = "UpdateHTTPServerSettings"
 
     ApplyLetsEncrypt = "ApplyLetsEncrypt"
     DeleteLetsEncrypt = "DeleteLetsEncrypt"
     GetLetsEncrypt = "GetLetsEncrypt"
 
+    GetServerStats = "GetServerStats"
+
+
+def tool_input_schema(model_class) -> dict:
+    """
+    The input schema of a tool, with the output, profile and cluster options
+    every tool accepts.
+    """
+    input_schema = model_class.model_json_schema()
+    output_schema = schema.OutputOptions.model_json_schema()
+    definitions = input_schema.setdefault("$defs", {})
+    for name, definition in output_schema.pop("$defs", {}).items():
+        assert definitions.get(name, definition) == definition, (
+            f"{model_class.__name__} and OutputOptions both define {name}"
+        )
+        definitions[name] = definition
+    input_schema.setdefault("properties", {})["output"] = output_schema
+    input_schema["properties"]["profile"] = {
+        "type": "boolean",
+        "description": "Save a CPU profile of this call on the server.",
+    }
+    input_schema["properties"]["cluster"] = {
+        "type": "string",
+        "description": f"The cluster to run on, one of {clusters.names()}, "
+        f"or {clusters.all_clusters} for all of them. "
+        f"Defaults to {settings.EG_DEFAULT_CLUSTER}.",
+    }
+    return input_schema
+
 
 async def serve():
     server = Server("Easegress")
+    # Tool call slots of every session, dropped with the session.
+    session_slots: WeakKeyDictionary = WeakKeyDictionary()
+
+    def get_session_slots() -> Optional[asyncio.Semaphore]:
+        try:
+            session = server.request_context.session
+        except LookupError:
+            # Called outside of an MCP request, e.g. by the benchmarks.
+            return None
+        slots = session_slots.get(session)
+        if slots is None:
+            slots = asyncio.Semaphore(settings.EG_SESSION_MAX_CONCURRENCY)
+            session_slots[session] = slots
+        return slots
 
     @server.list_tools()
     async def list_tools() -> list[Tool]:
         return [
             Tool(
                 name=EasegressTools.ListHTTPReverseProxies,
-                description="List all HTTP Reverse Proxies.",
-                inputSchema=schema.EmptySchema.model_json_schema(),
+                description="List HTTP Reverse Proxies, optionally filtered and paginated.",
+                inputSchema=tool_input_schema(schema.ListHTTPReverseProxiesSchema),
             ),
             Tool(
                 name=EasegressTools.CreateHTTPReverseProxy,
                 description="Create a new HTTP Reverse Proxy.",
-                inputSchema=schema.HTTPReverseProxySchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.HTTPReverseProxySchema),
+            ),
+            Tool(
+                name=EasegressTools.CreateHTTPReverseProxies,
+                description="Create multiple HTTP Reverse Proxies in one batch.",
+                inputSchema=tool_input_schema(schema.HTTPReverseProxiesSchema),
             ),
             Tool(
                 name=EasegressTools.DeleteHTTPReverseProxy,
                 description="Delete an HTTP Reverse Proxy.",
-                inputSchema=schema.NameSchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.NameSchema),
             ),
             Tool(
                 name=EasegressTools.UpdateHTTPReverseProxy,
                 description="Update an HTTP Reverse Proxy.",
-                inputSchema=schema.HTTPReverseProxySchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.HTTPReverseProxySchema),
             ),
             Tool(
                 name=EasegressTools.GetHTTPReverseProxy,
                 description="Get an HTTP Reverse Proxy.",
-                inputSchema=schema.NameSchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.GetHTTPReverseProxySchema),
+            ),
+            Tool(
+                name=EasegressTools.ApplyHTTPReverseProxies,
+                description="Converge HTTP Reverse Proxies to a desired set, "
+                "or only plan it with dryRun. With prune, the default, existing "
+                "proxies missing from the set are deleted.",
+                inputSchema=tool_input_schema(schema.ApplyHTTPReverseProxiesSchema),
+            ),
+            Tool(
+                name=EasegressTools.OptimizeHTTPServerRoutes,
+                description="Merge the rules of MCP-managed HTTP servers by host "
+                "and sort their paths by specificity, reporting rule counts "
+                "before and after.",
+                inputSchema=tool_input_schema(schema.OptimizeHTTPServerRoutesSchema),
+            ),
+            Tool(
+                name=EasegressTools.ResolveRoute,
+                description="Find the route, backend pipeline and endpoints "
+                "serving each of a batch of URLs, with the routes they shadow. "
+                "Resolves with the Ordered router's precedence and notes "
+                "servers using another router.",
+                inputSchema=tool_input_schema(schema.ResolveRouteSchema),
+            ),
+            Tool(
+                name=EasegressTools.GetHTTPServerSettings,
+                description="Get the performance settings of the HTTP server "
+                "of a port: keep-alive, connection limit, route cache, HTTP/3, "
+                "router kind and body size limit.",
+                inputSchema=tool_input_schema(schema.GetHTTPServerSettingsSchema),
+            ),
+            Tool(
+                name=EasegressTools.UpdateHTTPServerSettings,
+                description="Update the given performance settings of the HTTP "
+                "server of a port, leaving its routes and other settings as they are.",
+                inputSchema=tool_input_schema(schema.UpdateHTTPServerSettingsSchema),
             ),
             Tool(
                 name=EasegressTools.ApplyLetsEncrypt,
                 description="Apply a Let's Encrypt configuration.",
-                inputSchema=schema.LetsEncryptSchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.LetsEncryptSchema),
             ),
             Tool(
                 name=EasegressTools.DeleteLetsEncrypt,
                 description="Delete a Let's Encrypt configuration.",
-                inputSchema=schema.EmptySchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.EmptySchema),
             ),
             Tool(
                 name=EasegressTools.GetLetsEncrypt,
                 description="Get a Let's Encrypt configuration.",
-                inputSchema=schema.EmptySchema.model_json_schema(),
+                inputSchema=tool_input_schema(schema.EmptySchema),
+            ),
+            Tool(
+                name=EasegressTools.GetServerStats,
+                description="Get call counts, errors and latencies of the tools "
+                "and of the admin API requests they make, and cache hit rates.",
+                inputSchema=tool_input_schema(schema.GetServerStatsSchema),
             ),
         ]
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict) -> List[TextContent]:
         logger.info(f"Call tool: {name}, arguments: {arguments}")
+        arguments = dict(arguments or {})
+        profile = bool(arguments.pop("profile", False))
+
+        slots = get_session_slots()
+        if slots is None:
+            return await measured_call(name, arguments, profile)
+        async with slots:
+            return await measured_call(name, arguments, profile)
 
+    async def measured_call(
+        name: str, arguments: dict, profile: bool
+    ) -> List[TextContent]:
+        with metrics.tool_call(name):
+            # A single check when profiling is off.
+            if settings.EG_PROFILE_ENABLED or profile:
+                if profiler.should_profile(profile):
+                    return await profiler.run(name, dispatch(name, arguments))
+            return await dispatch(name, arguments)
+
+    async def dispatch(name: str, arguments: dict) -> List[TextContent]:
+        output = schema.OutputOptions(**(arguments.pop("output", None) or {}))
+        cluster = arguments.pop("cluster", None) or settings.EG_DEFAULT_CLUSTER
+
+        if name not in set(EasegressTools):
+            raise ValueError(f"Unknown tool name: {name}")
+        elif name == EasegressTools.GetServerStats:
+            # Stats are local to this server, not to a cluster.
+            resp = tools.get_server_stats(arguments)
+        elif cluster == clusters.all_clusters:
+            resp = await clusters.fan_out(lambda: run_tool(name, dict(arguments)))
+        else:
+            with clusters.use(cluster):
+                resp = await run_tool(name, arguments)
+        return utils.to_textcontent(resp, output)
+
+    async def run_tool(name: str, arguments: dict):
         if name == EasegressTools.ListHTTPReverseProxies:
-            resp = await tools.list_http_reverse_proxies()
-            return utils.to_textcontent(resp)
+            return await tools.list_http_reverse_proxies_page(arguments)
 
         elif name == EasegressTools.CreateHTTPReverseProxy:
-            resp = await tools.create_http_reverse_proxy(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.create_http_reverse_proxy(arguments)
+
+        elif name == EasegressTools.CreateHTTPReverseProxies:
+            return await tools.create_http_reverse_proxies(arguments)
 
         elif name == EasegressTools.DeleteHTTPReverseProxy:
-            resp = await tools.delete_http_reverse_proxy(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.delete_http_reverse_proxy(arguments)
 
         elif name == EasegressTools.UpdateHTTPReverseProxy:
-            resp = await tools.update_http_reverse_proxy(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.update_http_reverse_proxy(arguments)
 
         elif name == EasegressTools.GetHTTPReverseProxy:
-            resp = await tools.get_http_reverse_proxy(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.get_http_reverse_proxy(arguments)
+
+        elif name == EasegressTools.ApplyHTTPReverseProxies:
+            return await tools.apply_http_reverse_proxies(arguments)
+
+        elif name == EasegressTools.OptimizeHTTPServerRoutes:
+            return await tools.optimize_http_server_routes(arguments)
+
+        elif name == EasegressTools.ResolveRoute:
+            return await tools.resolve_route(arguments)
+
+        elif name == EasegressTools.GetHTTPServerSettings:
+            return await tools.get_http_server_settings(arguments)
+
+        elif name == EasegressTools.UpdateHTTPServerSettings:
+            return await tools.update_http_server_settings(arguments)
 
         elif name == EasegressTools.ApplyLetsEncrypt:
-            resp = await tools.apply_lets_encrypt(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.apply_lets_encrypt(arguments)
 
         elif name == EasegressTools.DeleteLetsEncrypt:
-            resp = await tools.delete_lets_encrypt(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.delete_lets_encrypt(arguments)
 
         elif name == EasegressTools.GetLetsEncrypt:
-            resp = await tools.get_lets_encrypt(arguments)
-            return utils.to_textcontent(resp)
+            return await tools.get_lets_encrypt(arguments)
 
         else:
             raise ValueError(f"Unknown tool name: {name}")
@@ -114,11 +261,57 @@ async def serve():
     return server
 
 
+async def run_stdio(server: Server):
+    options = server.create_initialization_options()
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+
+
+async def run_sse(server: Server):
+    # Only needed by this transport, and shipped with mcp.
+    import uvicorn
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.routing import Mount, Route
+
+    sse = SseServerTransport("/messages/")
+    options = server.create_initialization_options()
+
+    async def handle_sse(request):
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (
+            read_stream,
+            write_stream,
+        ):
+            # Errors are reported to the session instead of closing it.
+            await server.run(read_stream, write_stream, options)
+
+    app = Starlette(
+        routes=[
+            Route("/sse", endpoint=handle_sse),
+            Mount("/messages/", app=sse.handle_post_message),
+        ]
+    )
+    config = uvicorn.Config(app, host=settings.EG_SSE_HOST, port=settings.EG_SSE_PORT)
+    logger.info(
+        f"Serving MCP over SSE on http://{settings.EG_SSE_HOST}:{settings.EG_SSE_PORT}/sse"
+    )
+    await uvicorn.Server(config).serve()
+
+
 def run():
     async def _run():
         server = await serve()
-        options = server.create_initialization_options()
-        async with stdio_server() as (read_stream, write_stream):
-            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+        if settings.EG_MIRROR_ENABLED:
+            mirror.start()
+        try:
+            if settings.EG_TRANSPORT == "sse":
+                await run_sse(server)
+            elif settings.EG_TRANSPORT == "stdio":
+                await run_stdio(server)
+            else:
+                raise ValueError(f"Unknown transport: {settings.EG_TRANSPORT}")
+        finally:
+            await mirror.stop()
+            await client.close_async_client()
 
     asyncio.run(_run())
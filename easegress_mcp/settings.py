@@ -1 +1,77 @@
+import os
+
 EG_API_ADDRESS = "http://127.0.0.1:2381"
+
+# Named Easegress clusters, by admin API address. Tools run against
+# EG_DEFAULT_CLUSTER unless given a cluster argument; cluster "*" runs them
+# on every cluster concurrently, giving each at most EG_CLUSTER_TIMEOUT
+# seconds. The object mirror only follows the default cluster.
+EG_CLUSTERS = {"default": EG_API_ADDRESS}
+EG_DEFAULT_CLUSTER = "default"
+EG_CLUSTER_TIMEOUT = 60.0
+
+# Read-through cache of admin API objects, see egapis.ObjectCache.
+# Set EG_CACHE_TTL to 0 to disable it.
+EG_CACHE_TTL = 5.0
+EG_CACHE_MAX_SIZE = 1024
+
+# Background mirror of HTTPServer, Pipeline and AutoCertManager objects,
+# see mirror.ObjectMirror. Reads fall back to the admin API whenever the
+# mirror is older than EG_MIRROR_MAX_STALENESS seconds.
+EG_MIRROR_ENABLED = False
+EG_MIRROR_INTERVAL = 2.0
+EG_MIRROR_MAX_STALENESS = 10.0
+
+# Upper bound of concurrent admin API requests issued by one tool call.
+EG_MAX_CONCURRENCY = 16
+
+# Connection pool and timeouts (in seconds) of the admin API client.
+# EG_HTTP2 needs the optional h2 package, i.e. httpx[http2].
+EG_HTTP_MAX_CONNECTIONS = 100
+EG_HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+EG_HTTP_KEEPALIVE_EXPIRY = 30.0
+EG_HTTP_CONNECT_TIMEOUT = 5.0
+EG_HTTP_READ_TIMEOUT = 30.0
+EG_HTTP_WRITE_TIMEOUT = 30.0
+EG_HTTP_POOL_TIMEOUT = 10.0
+# Read timeout of the full /objects listing, which grows with the store.
+EG_HTTP_LIST_READ_TIMEOUT = 120.0
+EG_HTTP2 = False
+
+# Default tool output encoding, see schema.OutputOptions. Every tool takes
+# an optional output argument overriding these.
+EG_OUTPUT_FORMAT = "json"
+EG_OUTPUT_EXCLUDE_NONE = True
+EG_OUTPUT_EXCLUDE_DEFAULTS = False
+
+# Merge the rules of MCP-managed HTTPServers by host and sort their paths
+# by specificity whenever a proxy is mounted, see routing.optimize_rules.
+EG_OPTIMIZE_ROUTES = True
+
+# MCP transport: "stdio" serves the one client that spawned the process,
+# "sse" serves any number of concurrent sessions on EG_SSE_HOST:EG_SSE_PORT,
+# all sharing the admin API connection pools, object cache and mirror.
+# Each session runs at most EG_SESSION_MAX_CONCURRENCY tool calls at a time,
+# further calls of that session wait for a slot.
+EG_TRANSPORT = "stdio"
+EG_SSE_HOST = "127.0.0.1"
+EG_SSE_PORT = 8000
+EG_SESSION_MAX_CONCURRENCY = 4
+
+# Seconds an HTTPServer mutation waits for others on the same port, so they
+# are all applied with one GET and one write. See mutations.py.
+EG_MUTATION_WINDOW = 0.01
+
+# Performance settings of the HTTPServers MCP creates, such as
+# {"keepAlive": True, "maxConnections": 10240}, see schema.HTTPServerSettings.
+EG_HTTP_SERVER_SETTINGS: dict = {}
+
+# Opt-in CPU profiling of tool calls, see profiling.py. Read from the
+# environment so a slow server can be profiled without editing code.
+# Profiles one in EG_PROFILE_SAMPLE_RATE calls when enabled; a call passing
+# profile=true is profiled either way. Calls slower than
+# EG_PROFILE_SLOW_SECONDS are flagged in the log and the file name.
+EG_PROFILE_ENABLED = os.environ.get("EG_PROFILE_ENABLED", "").lower() in ("1", "true")
+EG_PROFILE_DIR = os.environ.get("EG_PROFILE_DIR", "profiles")
+EG_PROFILE_SAMPLE_RATE = int(os.environ.get("EG_PROFILE_SAMPLE_RATE", "1"))
+EG_PROFILE_SLOW_SECONDS = float(os.environ.get("EG_PROFILE_SLOW_SECONDS", "1.0"))
@@ -1,47 +1,64 @@
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+import base64
+import bisect
+import itertools
+import json
+from easegress_mcp import clusters
 from easegress_mcp import egapis
+from easegress_mcp import mutations
+from easegress_mcp import routing
 from easegress_mcp import schema
+from easegress_mcp import utils
+from easegress_mcp.log import logger
+from easegress_mcp.metrics import metrics
+from easegress_mcp.mirror import mirror
+from pydantic import ValidationError
 from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+import settings
 
 mcp_http_server_name_prefix = "mcp_http_server_"
 mcp_pipeline_name_prefix = "mcp_pipeline_"
 mcp_proxy_filter_name = "mcp_proxy"
+# Key in Pipeline.data holding the proxy's route, see route_metadata.
+mcp_pipeline_data_key = "mcpHTTPReverseProxy"
+mcp_retry_policy_name = "mcp_retry"
 
-# HTTP Reverse Proxy part.
-
+# The fields of a proxy kept in the Proxy filter of its pipeline.
+upstream_fields = {
+    "endpoints",
+    "loadBalance",
+    "headerHashKey",
+    "weights",
+    "timeout",
+    "maxIdleConns",
+    "maxIdleConnsPerHost",
+    "retry",
+    "failureCodes",
+    "cache",
+    "compression",
+}
 
-async def guarantee_http_server_exists(port: int):
-    http_server_name = mcp_http_server_name_prefix + str(port)
-    try:
-        http_server = await egapis.get_http_server(http_server_name)
-    except HTTPError as e:
-        if e.code == 404:
-            http_server = schema.HTTPServer(
-                name=http_server_name,
-                kind="HTTPServer",
-                port=port,
-                rules=[],
-            )
-            await egapis.create_http_server(http_server)
-        else:
-            raise
+# HTTP Reverse Proxy part.
 
-    return http_server
 
+def mirror_available() -> bool:
+    return mirror.running and clusters.current() == settings.EG_DEFAULT_CLUSTER
 
-async def mount_http_reverse_proxy(http_reverse_proxy: schema.HTTPReverseProxySchema):
-    http_server_name = mcp_http_server_name_prefix + str(http_reverse_proxy.port)
-    pipeline_name = mcp_pipeline_name_prefix + http_reverse_proxy.name
 
-    http_server = await egapis.get_http_server(http_server_name)
-    if not http_server:
-        raise HTTPError(f"HTTP server {http_server_name} not found")
+async def get_object_snapshot(refresh: bool = False) -> egapis.ObjectSnapshot:
+    """
+    Read from the background mirror when it is running and covers the
+    current cluster, otherwise from the admin API.
+    """
+    if mirror_available():
+        return await mirror.snapshot(refresh)
+    return await egapis.get_object_snapshot(use_cache=not refresh)
 
-    pipeline = await egapis.get_pipeline(pipeline_name)
-    if not pipeline:
-        raise HTTPError(f"Pipeline {pipeline_name} not found")
 
-    pipeline_rule = schema.Rule(
+def build_rule(http_reverse_proxy: schema.HTTPReverseProxySchema) -> schema.Rule:
+    return schema.Rule(
         host=http_reverse_proxy.host,
         paths=[
             schema.Path(
@@ -51,129 +68,449 @@ async def mount_http_reverse_proxy(http_reverse_proxy: schema.HTTPReverseProxySc
                 pathPrefix=http_reverse_proxy.path
                 if http_reverse_proxy.isPathPrefix
                 else "",
-                backend=pipeline.name,
+                backend=mcp_pipeline_name_prefix + http_reverse_proxy.name,
             )
         ],
     )
 
+
+def apply_rule(http_server: schema.HTTPServer, pipeline_rule: schema.Rule):
+    """
+    Point the route to the pipeline at the new host and paths. A rule that
+    only routes to the pipeline is updated in place. Otherwise the pipeline's
+    paths leave the rule they share and join the plain rule of their new
+    host, or a new rule appended to the server.
+    """
+    backend = pipeline_rule.paths[0].backend
     for rule in http_server.rules:
-        for path in rule.paths:
-            if path.backend == pipeline.name:
-                rule.host = pipeline_rule.host
-                rule.paths = pipeline_rule.paths
-                await egapis.update_http_server(http_server)
-                return
+        if rule.paths and all(path.backend == backend for path in rule.paths):
+            rule.host = pipeline_rule.host
+            rule.paths = pipeline_rule.paths
+            return
 
+    remove_backend(http_server, backend)
+    for rule in http_server.rules:
+        if routing.is_plain(rule) and rule.host == pipeline_rule.host:
+            rule.paths.extend(pipeline_rule.paths)
+            return
     http_server.rules.append(pipeline_rule)
 
-    await egapis.update_http_server(http_server)
+
+# Keyed by (cluster, port).
+mutation_queues: Dict[tuple[str, int], mutations.HTTPServerMutationQueue] = {}
+
+
+def get_mutation_queue(port: int) -> mutations.HTTPServerMutationQueue:
+    key = (clusters.current(), port)
+    queue = mutation_queues.get(key)
+    if queue is None:
+        queue = mutations.HTTPServerMutationQueue(
+            mcp_http_server_name_prefix + str(port),
+            port,
+            settings.EG_MUTATION_WINDOW,
+        )
+        mutation_queues[key] = queue
+    return queue
+
+
+async def mount_http_reverse_proxy(http_reverse_proxy: schema.HTTPReverseProxySchema):
+    await mount_http_reverse_proxies_on_port(
+        http_reverse_proxy.port, [http_reverse_proxy]
+    )
+
+
+async def mount_http_reverse_proxies_on_port(
+    port: int, http_reverse_proxies: list[schema.HTTPReverseProxySchema]
+):
+    """
+    Route the proxies on the port, creating its HTTPServer if needed.
+    """
+
+    def mount(http_server: schema.HTTPServer):
+        for http_reverse_proxy in http_reverse_proxies:
+            apply_rule(http_server, build_rule(http_reverse_proxy))
+        if settings.EG_OPTIMIZE_ROUTES:
+            routing.optimize_http_server(http_server)
+
+    await get_mutation_queue(port).submit(mount)
+
+
+def remove_backend(http_server: schema.HTTPServer, backend: str):
+    for rule in http_server.rules:
+        rule.paths = [path for path in rule.paths if path.backend != backend]
+    http_server.rules = [rule for rule in http_server.rules if rule.paths]
 
 
 async def unmount_http_reverse_proxy(http_reverse_proxy: schema.HTTPReverseProxySchema):
-    http_server_name = mcp_http_server_name_prefix + str(http_reverse_proxy.port)
+    """
+    Remove the proxy's route from the port, deleting the HTTPServer once it
+    has no rules left.
+    """
     pipeline_name = mcp_pipeline_name_prefix + http_reverse_proxy.name
+    await get_mutation_queue(http_reverse_proxy.port).submit(
+        lambda http_server: remove_backend(http_server, pipeline_name)
+    )
 
-    http_server = await egapis.get_http_server(http_server_name)
 
-    for rule in http_server.rules:
-        for path in rule.paths:
-            if path.backend == pipeline_name:
-                http_server.rules.remove(rule)
-                break
+def index_routes_by_backend(
+    http_servers: list[schema.HTTPServer],
+) -> Dict[str, list[tuple[schema.HTTPServer, schema.Rule, schema.Path]]]:
+    """
+    Map every backend pipeline name to the (server, rule, path) routing to it.
 
-    if (
-        http_server.name.startswith(mcp_http_server_name_prefix)
-        and len(http_server.rules) == 0
+    Only MCP-managed HTTPServers are indexed. A backend gets at most one
+    entry per server; when a server routes to it more than once the last
+    path wins, matching how rules are mounted.
+    """
+    routes: Dict[str, list[tuple[schema.HTTPServer, schema.Rule, schema.Path]]] = {}
+
+    for http_server in http_servers:
+        if not http_server.name.startswith(mcp_http_server_name_prefix):
+            continue
+
+        server_routes: Dict[str, tuple[schema.Rule, schema.Path]] = {}
+        for rule in http_server.rules:
+            for path in rule.paths:
+                server_routes[path.backend] = (rule, path)
+
+        for backend, (rule, path) in server_routes.items():
+            routes.setdefault(backend, []).append((http_server, rule, path))
+
+    return routes
+
+
+def pipeline_endpoints(pipeline: schema.Pipeline) -> list[str]:
+    endpoints = []
+    for filter in pipeline.filters:
+        if filter["kind"] != "Proxy":
+            continue
+        for pool in filter["pools"]:
+            for server in pool["servers"]:
+                endpoints.append(server["url"])
+    return endpoints
+
+
+def pipeline_upstream(pipeline: schema.Pipeline) -> dict:
+    """
+    The upstream tuning of a proxy, read from the first pool of the Proxy
+    filter of its pipeline.
+    """
+    for filter in pipeline.filters:
+        if filter["kind"] != "Proxy" or not filter.get("pools"):
+            continue
+        pool = filter["pools"][0]
+        load_balance = pool.get("loadBalance") or {}
+        weights = {
+            server["url"]: server["weight"]
+            for server in pool["servers"]
+            if server.get("weight") is not None
+        }
+        retry = None
+        if pool.get("retryPolicy"):
+            for policy in pipeline.resilience or []:
+                if policy.get("name") == pool["retryPolicy"]:
+                    retry = {
+                        key: policy[key]
+                        for key in schema.ProxyRetrySchema.model_fields
+                        if key in policy
+                    }
+        return {
+            "loadBalance": load_balance.get("policy"),
+            "headerHashKey": load_balance.get("headerHashKey"),
+            "weights": weights or None,
+            "timeout": pool.get("timeout"),
+            "maxIdleConns": filter.get("maxIdleConns"),
+            "maxIdleConnsPerHost": filter.get("maxIdleConnsPerHost"),
+            "retry": retry,
+            "failureCodes": pool.get("failureCodes"),
+            "cache": pool.get("memoryCache"),
+            "compression": filter.get("compression"),
+        }
+    return {}
+
+
+def format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        ".".join(str(part) for part in error["loc"]) + f": {error['msg']}"
+        if error["loc"]
+        else error["msg"]
+        for error in e.errors()
+    )
+
+
+def to_http_reverse_proxy(
+    pipeline: schema.Pipeline,
+    http_server: schema.HTTPServer,
+    rule: schema.Rule,
+    path: schema.Path,
+    endpoints: list[str],
+    lenient: bool = False,
+) -> schema.HTTPReverseProxySchema:
+    """
+    The tuning of a pipeline edited outside of MCP may not be valid tool
+    input. This raises a ValidationError then, or with lenient, leaves the
+    tuning out.
+    """
+    isPathPrefix = len(path.pathPrefix) > 0
+    route = dict(
+        name=pipeline.name[len(mcp_pipeline_name_prefix) :],
+        port=http_server.port,
+        host=rule.host,
+        path=path.pathPrefix if isPathPrefix else path.path,
+        isPathPrefix=isPathPrefix,
+        endpoints=list(endpoints),
+    )
+    try:
+        return schema.HTTPReverseProxySchema(**route, **pipeline_upstream(pipeline))
+    except ValidationError:
+        if not lenient:
+            raise
+        return schema.HTTPReverseProxySchema(**route)
+
+
+def encode_cursor(http_reverse_proxy: schema.HTTPReverseProxySchema) -> str:
+    position = json.dumps([http_reverse_proxy.name, http_reverse_proxy.port])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        name, port = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(name), int(port)
+    except Exception:
+        raise ValueError(f"Invalid cursor {cursor}")
+
+
+def match_route(
+    list_schema: schema.ListHTTPReverseProxiesSchema,
+    rule: schema.Rule,
+    path: schema.Path,
+) -> bool:
+    if list_schema.hostPrefix is not None and not rule.host.startswith(
+        list_schema.hostPrefix
     ):
-        print(f"HTTP server {http_server.name} has no rules, deleting it")
-        await egapis.delete_http_server(http_server.name)
-        return
+        return False
+    if list_schema.pathPrefix is not None and not (
+        path.pathPrefix or path.path
+    ).startswith(list_schema.pathPrefix):
+        return False
+    return True
 
-    await egapis.update_http_server(http_server)
 
+def iter_http_reverse_proxies(
+    snapshot: egapis.ObjectSnapshot,
+    list_schema: schema.ListHTTPReverseProxiesSchema,
+    errors: Optional[list[str]] = None,
+) -> Iterator[schema.HTTPReverseProxySchema]:
+    """
+    Yield the proxies matching list_schema ordered by (name, port), after
+    its cursor. Route filters run before the pipeline is even built, so only
+    proxies that are actually returned are materialized. Proxies whose
+    settings can't be read are skipped and reported in errors.
+    """
+    if list_schema.port is not None:
+        http_server = snapshot.get_http_server(
+            mcp_http_server_name_prefix + str(list_schema.port)
+        )
+        http_servers = [http_server] if http_server is not None else []
+    else:
+        http_servers = snapshot.http_servers(mcp_http_server_name_prefix)
+    routes = index_routes_by_backend(http_servers)
 
-async def list_http_reverse_proxies() -> list[schema.HTTPReverseProxySchema]:
-    http_servers = await egapis.list_http_servers()
-    pipelines = await egapis.list_pipelines()
-    http_reverse_proxies = []
+    after = decode_cursor(list_schema.cursor) if list_schema.cursor else None
+    names = sorted(
+        name[len(mcp_pipeline_name_prefix) :]
+        for name in snapshot.objects("Pipeline")
+        if name.startswith(mcp_pipeline_name_prefix) and name in routes
+    )
+    if after is not None:
+        names = names[bisect.bisect_left(names, after[0]) :]
 
-    for pipeline in pipelines:
-        if not pipeline.name.startswith(mcp_pipeline_name_prefix):
+    for name in names:
+        pipeline_name = mcp_pipeline_name_prefix + name
+        pipeline_routes = sorted(
+            (
+                route
+                for route in routes[pipeline_name]
+                if match_route(list_schema, route[1], route[2])
+                and (after is None or (name, route[0].port) > after)
+            ),
+            key=lambda route: route[0].port,
+        )
+        if not pipeline_routes:
             continue
 
-        for http_server in http_servers:
-            if not http_server.name.startswith(mcp_http_server_name_prefix):
-                continue
+        pipeline = snapshot.get_pipeline(pipeline_name)
+        endpoints = pipeline_endpoints(pipeline)
+        if list_schema.endpointContains is not None and not any(
+            list_schema.endpointContains in endpoint for endpoint in endpoints
+        ):
+            continue
 
-            rule_host, rule_path, isPathPrefix = "", "", False
-            found = False
-            for rule in http_server.rules:
-                for path in rule.paths:
-                    if path.backend != pipeline.name:
-                        continue
-                    found = True
-                    rule_host = rule.host
-                    rule_path = path.path
-                    if len(path.pathPrefix) > 0:
-                        rule_path = path.pathPrefix
-                        isPathPrefix = True
-
-            if not found:
+        for http_server, rule, path in pipeline_routes:
+            try:
+                http_reverse_proxy = to_http_reverse_proxy(
+                    pipeline, http_server, rule, path, endpoints
+                )
+            except ValidationError as e:
+                error = (
+                    f"Proxy {name} has invalid settings: {format_validation_error(e)}"
+                )
+                logger.warning(error)
+                if errors is not None:
+                    errors.append(error)
                 continue
+            yield http_reverse_proxy
 
-            endpoints = []
-            for filter in pipeline.filters:
-                if filter["kind"] != "Proxy":
-                    continue
-                for pool in filter["pools"]:
-                    for server in pool["servers"]:
-                        endpoints.append(server["url"])
-
-            http_reverse_proxies.append(
-                schema.HTTPReverseProxySchema(
-                    name=pipeline.name[len(mcp_pipeline_name_prefix) :],
-                    port=http_server.port,
-                    host=rule_host,
-                    path=rule_path,
-                    isPathPrefix=isPathPrefix,
-                    endpoints=endpoints,
-                )
+
+async def list_http_reverse_proxies(
+    arguments: Optional[dict] = None,
+    snapshot: Optional[egapis.ObjectSnapshot] = None,
+    errors: Optional[list[str]] = None,
+) -> list[schema.HTTPReverseProxySchema]:
+    list_schema = schema.ListHTTPReverseProxiesSchema(**(arguments or {}))
+    if snapshot is None:
+        snapshot = await get_object_snapshot(list_schema.refresh)
+
+    if list_schema.limit is None:
+        # Everything is returned, so build the pipelines in one batch.
+        snapshot.pipelines(mcp_pipeline_name_prefix)
+    with egapis.gc_paused():
+        return list(
+            itertools.islice(
+                iter_http_reverse_proxies(snapshot, list_schema, errors),
+                list_schema.limit,
             )
-    return http_reverse_proxies
+        )
 
 
-async def create_http_reverse_proxy(arguments: dict):
-    http_reverse_proxy = schema.HTTPReverseProxySchema(**arguments)
-    pipeline_name = mcp_pipeline_name_prefix + http_reverse_proxy.name
+async def list_http_reverse_proxies_page(
+    arguments: dict,
+) -> schema.HTTPReverseProxyPage:
+    list_schema = schema.ListHTTPReverseProxiesSchema(**arguments)
+    snapshot = await get_object_snapshot(list_schema.refresh)
+
+    errors: list[str] = []
+    if list_schema.limit is None:
+        items = await list_http_reverse_proxies(arguments, snapshot, errors)
+        return schema.HTTPReverseProxyPage(items=items, errors=errors or None)
+
+    # Look one past the page to know whether there is a next one.
+    with egapis.gc_paused():
+        items = list(
+            itertools.islice(
+                iter_http_reverse_proxies(snapshot, list_schema, errors),
+                list_schema.limit + 1,
+            )
+        )
+    page = schema.HTTPReverseProxyPage(
+        items=items[: list_schema.limit], errors=errors or None
+    )
+    if len(items) > list_schema.limit:
+        page.nextCursor = encode_cursor(page.items[-1])
+    return page
+
+
+def route_metadata(http_reverse_proxy: schema.HTTPReverseProxySchema) -> dict:
+    """
+    The route of the proxy as stored in its pipeline, so the proxy can be
+    read without joining against every HTTPServer.
+    """
+    return http_reverse_proxy.model_dump(
+        include={"port", "host", "path", "isPathPrefix"}
+    )
+
+
+def upstream_settings(http_reverse_proxy: schema.HTTPReverseProxySchema) -> dict:
+    return http_reverse_proxy.model_dump(include=upstream_fields)
+
+
+def set_pipeline_upstream(
+    pipeline: schema.Pipeline, http_reverse_proxy: schema.HTTPReverseProxySchema
+):
+    """
+    Write the endpoints, upstream tuning, cache and compression of the
+    proxy into the Proxy filters of its pipeline, keeping the fields MCP
+    doesn't manage, the other filters of the flow and the other resilience
+    policies.
+    """
+    weights = http_reverse_proxy.weights or {}
+    load_balance = None
+    if http_reverse_proxy.loadBalance is not None:
+        load_balance = schema.LoadBalance(
+            policy=http_reverse_proxy.loadBalance,
+            headerHashKey=http_reverse_proxy.headerHashKey,
+        )
+    pool = schema.ProxyPool(
+        servers=[
+            schema.PoolServer(url=url, weight=weights.get(url))
+            for url in http_reverse_proxy.endpoints
+        ],
+        loadBalance=load_balance,
+        timeout=http_reverse_proxy.timeout,
+        retryPolicy=mcp_retry_policy_name if http_reverse_proxy.retry else None,
+        failureCodes=http_reverse_proxy.failureCodes,
+        memoryCache=http_reverse_proxy.cache,
+    ).model_dump(mode="json", exclude_none=True)
+    filter_settings = {
+        "maxIdleConns": http_reverse_proxy.maxIdleConns,
+        "maxIdleConnsPerHost": http_reverse_proxy.maxIdleConnsPerHost,
+        "compression": http_reverse_proxy.compression.model_dump()
+        if http_reverse_proxy.compression
+        else None,
+    }
+
+    for filter in pipeline.filters:
+        if filter["kind"] != "Proxy":
+            continue
+        # Such as a circuit breaker policy set outside of MCP.
+        unmanaged = {
+            key: value
+            for key, value in (filter.get("pools") or [{}])[0].items()
+            if key not in schema.ProxyPool.model_fields
+        }
+        filter["pools"] = [{**unmanaged, **pool}]
+        for field, value in filter_settings.items():
+            if value is None:
+                filter.pop(field, None)
+            else:
+                filter[field] = value
+
+    resilience = [
+        policy
+        for policy in pipeline.resilience or []
+        if policy.get("name") != mcp_retry_policy_name
+    ]
+    if http_reverse_proxy.retry is not None:
+        resilience.append(
+            schema.RetryPolicy(
+                name=mcp_retry_policy_name, **http_reverse_proxy.retry.model_dump()
+            ).model_dump(mode="json", exclude_none=True)
+        )
+    pipeline.resilience = resilience or None
 
-    await guarantee_http_server_exists(http_reverse_proxy.port)
 
+def build_pipeline(
+    http_reverse_proxy: schema.HTTPReverseProxySchema,
+) -> schema.Pipeline:
     pipeline = schema.Pipeline(
-        name=pipeline_name,
+        name=mcp_pipeline_name_prefix + http_reverse_proxy.name,
         kind="Pipeline",
+        data={mcp_pipeline_data_key: route_metadata(http_reverse_proxy)},
         flow=[
             schema.PipelineFlowNode(
                 filter=mcp_proxy_filter_name,
             )
         ],
-        filters=[
-            {
-                "kind": "Proxy",
-                "name": mcp_proxy_filter_name,
-                "pools": [
-                    {
-                        "servers": [
-                            schema.PoolServer(url=url)
-                            for url in http_reverse_proxy.endpoints
-                        ]
-                    }
-                ],
-            }
-        ],
+        filters=[{"kind": "Proxy", "name": mcp_proxy_filter_name}],
     )
+    set_pipeline_upstream(pipeline, http_reverse_proxy)
+    return pipeline
+
 
+async def create_pipeline(http_reverse_proxy: schema.HTTPReverseProxySchema):
     try:
-        await egapis.create_pipeline(pipeline)
+        await egapis.create_pipeline(build_pipeline(http_reverse_proxy))
     except HTTPError as e:
         if e.code == 409:
             raise HTTPError(
@@ -186,13 +523,351 @@ async def create_http_reverse_proxy(arguments: dict):
         else:
             raise
 
+
+async def create_http_reverse_proxy(arguments: dict):
+    http_reverse_proxy = schema.HTTPReverseProxySchema(**arguments)
+
+    await create_pipeline(http_reverse_proxy)
+
     await mount_http_reverse_proxy(http_reverse_proxy)
 
 
+async def create_http_reverse_proxies(
+    arguments: dict,
+) -> list[schema.HTTPReverseProxyResult]:
+    batch = schema.HTTPReverseProxiesSchema(**arguments)
+    results = [
+        schema.HTTPReverseProxyResult(name=proxy.name) for proxy in batch.proxies
+    ]
+
+    pending: list[
+        tuple[schema.HTTPReverseProxySchema, schema.HTTPReverseProxyResult]
+    ] = []
+    seen = set()
+    for proxy, result in zip(batch.proxies, results):
+        if proxy.name in seen:
+            result.error = f"Proxy {proxy.name} is duplicated in the batch"
+            continue
+        seen.add(proxy.name)
+        pending.append((proxy, result))
+
+    created = await utils.gather_with_concurrency(
+        settings.EG_MAX_CONCURRENCY,
+        *[create_pipeline(proxy) for proxy, _ in pending],
+    )
+
+    by_port: Dict[
+        int, list[tuple[schema.HTTPReverseProxySchema, schema.HTTPReverseProxyResult]]
+    ] = {}
+    for (proxy, result), error in zip(pending, created):
+        if isinstance(error, Exception):
+            result.error = str(error)
+            continue
+        by_port.setdefault(proxy.port, []).append((proxy, result))
+
+    ports = list(by_port)
+    mounted = await utils.gather_with_concurrency(
+        settings.EG_MAX_CONCURRENCY,
+        *[
+            mount_http_reverse_proxies_on_port(
+                port, [proxy for proxy, _ in by_port[port]]
+            )
+            for port in ports
+        ],
+    )
+
+    rollbacks = []
+    for port, error in zip(ports, mounted):
+        for proxy, result in by_port[port]:
+            if isinstance(error, Exception):
+                result.error = str(error)
+                rollbacks.append(
+                    egapis.delete_pipeline(mcp_pipeline_name_prefix + proxy.name)
+                )
+            else:
+                result.success = True
+    # Don't leave unrouted pipelines behind when their port failed.
+    await utils.gather_with_concurrency(settings.EG_MAX_CONCURRENCY, *rollbacks)
+
+    return results
+
+
+def plan_http_reverse_proxies(
+    desired: list[schema.HTTPReverseProxySchema],
+    current: list[schema.HTTPReverseProxySchema],
+    prune: bool,
+    unlisted: Optional[Dict[str, list[int]]] = None,
+) -> list[schema.HTTPReverseProxyPlanItem]:
+    """
+    unlisted maps the proxies whose pipeline exists but which current lacks
+    to the ports routing to them: pipelines without any route, such as one
+    left behind by a failed mount, and proxies whose settings can't be
+    read. A desired one is rewritten and routed rather than created again,
+    the others are deleted and unmounted from every port when pruning.
+    """
+    unlisted = unlisted or {}
+    Action = schema.HTTPReverseProxyPlanAction
+    current_by_name: Dict[str, schema.HTTPReverseProxySchema] = {}
+    for http_reverse_proxy in current:
+        current_by_name.setdefault(http_reverse_proxy.name, http_reverse_proxy)
+
+    items = []
+    for want in desired:
+        have = current_by_name.get(want.name)
+        if have is None and want.name in unlisted:
+            items.append(
+                schema.HTTPReverseProxyPlanItem(
+                    name=want.name, action=Action.updateEndpoints, port=want.port
+                )
+            )
+            for from_port in [
+                port for port in unlisted[want.name] if port != want.port
+            ] or [None]:
+                items.append(
+                    schema.HTTPReverseProxyPlanItem(
+                        name=want.name,
+                        action=Action.moveRoute,
+                        port=want.port,
+                        fromPort=from_port,
+                    )
+                )
+            continue
+        if have is None:
+            items.append(
+                schema.HTTPReverseProxyPlanItem(
+                    name=want.name, action=Action.create, port=want.port
+                )
+            )
+            continue
+
+        if upstream_settings(have) != upstream_settings(want):
+            items.append(
+                schema.HTTPReverseProxyPlanItem(
+                    name=want.name, action=Action.updateEndpoints, port=want.port
+                )
+            )
+        if route_metadata(have) != route_metadata(want):
+            items.append(
+                schema.HTTPReverseProxyPlanItem(
+                    name=want.name,
+                    action=Action.moveRoute,
+                    port=want.port,
+                    fromPort=have.port if have.port != want.port else None,
+                )
+            )
+
+    if prune:
+        desired_names = {want.name for want in desired}
+        for name, have in current_by_name.items():
+            if name not in desired_names:
+                items.append(
+                    schema.HTTPReverseProxyPlanItem(
+                        name=name, action=Action.delete, port=have.port
+                    )
+                )
+        for name, ports in unlisted.items():
+            if name in desired_names:
+                continue
+            for port in ports or [None]:
+                items.append(
+                    schema.HTTPReverseProxyPlanItem(
+                        name=name, action=Action.delete, port=port
+                    )
+                )
+
+    return items
+
+
+def count_plan_api_calls(items: list[schema.HTTPReverseProxyPlanItem]) -> int:
+    """
+    Every proxy in the plan takes exactly one pipeline write, and every
+    affected port one GET and one write of its HTTPServer.
+    """
+    ports = set()
+    for item in items:
+        if item.action != schema.HTTPReverseProxyPlanAction.updateEndpoints:
+            ports.add(item.port)
+        if item.fromPort is not None:
+            ports.add(item.fromPort)
+    ports.discard(None)
+    return len({item.name for item in items}) + 2 * len(ports)
+
+
+async def apply_http_reverse_proxies(arguments: dict) -> schema.HTTPReverseProxyPlan:
+    apply_schema = schema.ApplyHTTPReverseProxiesSchema(**arguments)
+    Action = schema.HTTPReverseProxyPlanAction
+
+    seen, duplicated = set(), set()
+    for proxy in apply_schema.proxies:
+        if proxy.name in seen:
+            duplicated.add(proxy.name)
+        seen.add(proxy.name)
+    if duplicated:
+        raise ValueError(f"Proxies {sorted(duplicated)} are duplicated")
+    if (
+        apply_schema.prune
+        and not apply_schema.proxies
+        and not apply_schema.confirmDeleteAll
+    ):
+        raise ValueError(
+            "An empty proxies with prune deletes every proxy, "
+            "set confirmDeleteAll to do so"
+        )
+    desired = {proxy.name: proxy for proxy in apply_schema.proxies}
+
+    snapshot = await get_object_snapshot(refresh=True)
+    errors: list[str] = []
+    current = await list_http_reverse_proxies(snapshot=snapshot, errors=errors)
+    listed = {mcp_pipeline_name_prefix + proxy.name for proxy in current}
+    routes = index_routes_by_backend(snapshot.http_servers(mcp_http_server_name_prefix))
+    unlisted = {
+        name[len(mcp_pipeline_name_prefix) :]: sorted(
+            {http_server.port for http_server, _, _ in routes.get(name, [])}
+        )
+        for name in snapshot.objects("Pipeline")
+        if name.startswith(mcp_pipeline_name_prefix) and name not in listed
+    }
+    items = plan_http_reverse_proxies(
+        apply_schema.proxies, current, apply_schema.prune, unlisted
+    )
+    plan = schema.HTTPReverseProxyPlan(
+        dryRun=apply_schema.dryRun,
+        items=items,
+        apiCalls=count_plan_api_calls(items),
+        errors=errors or None,
+    )
+    if apply_schema.dryRun or not items:
+        return plan
+
+    items_by_name: Dict[str, list[schema.HTTPReverseProxyPlanItem]] = {}
+    for item in items:
+        items_by_name.setdefault(item.name, []).append(item)
+
+    def fail(name: str, error: Exception):
+        for item in items_by_name[name]:
+            if item.error is None:
+                item.success = False
+                item.error = str(error)
+
+    # Step 1: create and update pipelines. A proxy whose endpoints and route
+    # both changed still gets a single pipeline PUT.
+    creates = [item.name for item in items if item.action == Action.create]
+    updates = list(
+        dict.fromkeys(
+            item.name
+            for item in items
+            if item.action in (Action.updateEndpoints, Action.moveRoute)
+        )
+    )
+
+    async def update_pipeline(name: str):
+        # The snapshot may be the mirror's, shared with every other call.
+        pipeline = snapshot.get_pipeline(mcp_pipeline_name_prefix + name)
+        pipeline = pipeline.model_copy(deep=True)
+        set_pipeline_upstream(pipeline, desired[name])
+        pipeline.data = {
+            **(pipeline.data or {}),
+            mcp_pipeline_data_key: route_metadata(desired[name]),
+        }
+        await egapis.update_pipeline(pipeline)
+
+    results = await utils.gather_with_concurrency(
+        settings.EG_MAX_CONCURRENCY,
+        *[create_pipeline(desired[name]) for name in creates],
+        *[update_pipeline(name) for name in updates],
+    )
+    for name, result in zip(creates + updates, results):
+        if isinstance(result, Exception):
+            fail(name, result)
+
+    # Step 2: one HTTPServer write per affected port.
+    mounts: Dict[int, list[schema.HTTPReverseProxySchema]] = {}
+    unmounts: Dict[int, list[str]] = {}
+    for item in items:
+        if item.error is not None:
+            continue
+        if item.action in (Action.create, Action.moveRoute):
+            mounts.setdefault(item.port, []).append(desired[item.name])
+        if item.action == Action.delete and item.port is not None:
+            unmounts.setdefault(item.port, []).append(item.name)
+        if item.fromPort is not None:
+            unmounts.setdefault(item.fromPort, []).append(item.name)
+
+    def port_mutation(port: int):
+        def mutate(http_server: schema.HTTPServer):
+            for http_reverse_proxy in mounts.get(port, []):
+                apply_rule(http_server, build_rule(http_reverse_proxy))
+            for name in unmounts.get(port, []):
+                remove_backend(http_server, mcp_pipeline_name_prefix + name)
+            if settings.EG_OPTIMIZE_ROUTES and port in mounts:
+                routing.optimize_http_server(http_server)
+
+        return mutate
+
+    ports = list(dict.fromkeys([*mounts, *unmounts]))
+    results = await utils.gather_with_concurrency(
+        settings.EG_MAX_CONCURRENCY,
+        *[get_mutation_queue(port).submit(port_mutation(port)) for port in ports],
+    )
+    for port, result in zip(ports, results):
+        if isinstance(result, Exception):
+            for http_reverse_proxy in mounts.get(port, []):
+                fail(http_reverse_proxy.name, result)
+            for name in unmounts.get(port, []):
+                fail(name, result)
+
+    # Step 3: delete pipelines once nothing routes to them.
+    deletes = list(
+        dict.fromkeys(
+            item.name
+            for item in items
+            if item.action == Action.delete and item.error is None
+        )
+    )
+    results = await utils.gather_with_concurrency(
+        settings.EG_MAX_CONCURRENCY,
+        *[egapis.delete_pipeline(mcp_pipeline_name_prefix + name) for name in deletes],
+    )
+    for name, result in zip(deletes, results):
+        if isinstance(result, Exception):
+            fail(name, result)
+
+    for item in items:
+        if item.error is None:
+            item.success = True
+    return plan
+
+
 async def delete_http_reverse_proxy(arguments: dict):
     name = arguments["name"]
     pipeline_name = mcp_pipeline_name_prefix + name
-    http_servers = await egapis.list_http_servers()
+    snapshot = await get_object_snapshot(refresh=True)
+    routes = index_routes_by_backend(
+        snapshot.http_servers(mcp_http_server_name_prefix)
+    ).get(pipeline_name, [])
+    if snapshot.get_pipeline(pipeline_name) is None and not routes:
+        raise HTTPError(
+            f"{egapis.url_prefix()}/objects/{pipeline_name}",
+            404,
+            f"Proxy {name} not found",
+            None,
+            None,
+        )
+
+    # Unmount before deleting the pipeline, so no route is left pointing at
+    # a missing backend. Only the servers routing to it need a write.
+    results = await utils.gather_with_concurrency(
+        settings.EG_MAX_CONCURRENCY,
+        *[
+            unmount_http_reverse_proxy(
+                schema.HTTPReverseProxySchema(name=name, port=http_server.port)
+            )
+            for http_server, _, _ in routes
+        ],
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
 
     try:
         await egapis.delete_pipeline(pipeline_name)
@@ -202,50 +877,362 @@ async def delete_http_reverse_proxy(arguments: dict):
         else:
             raise
 
-    for http_server in http_servers:
-        http_reverse_proxy = schema.HTTPReverseProxySchema(
-            name=name,
-            port=http_server.port,
+
+async def update_http_reverse_proxy(arguments: dict):
+    name = arguments.get(
+        "name", schema.HTTPReverseProxySchema.model_fields["name"].default
+    )
+
+    # Writes are computed from a fresh read, never from the cache. Tuning
+    # that can't be read is overwritten.
+    current, pipeline = await fetch_http_reverse_proxy(
+        name, use_cache=False, lenient=True
+    )
+
+    # Tuning, cache and compression left out of the arguments are kept,
+    # passing null removes them. The arguments are validated once merged,
+    # so e.g. a new headerHashKey alone is checked against the kept policy.
+    kept = {
+        field: getattr(current, field)
+        for field in upstream_fields - {"endpoints"} - arguments.keys()
+    }
+    policy = kept.get("loadBalance", arguments.get("loadBalance"))
+    if policy != schema.LoadBalancePolicyEnum.headerHash:
+        kept.pop("headerHashKey", None)
+    if kept.get("weights"):
+        endpoints = arguments.get("endpoints") or []
+        kept["weights"] = {
+            url: weight for url, weight in kept["weights"].items() if url in endpoints
+        } or None
+    http_reverse_proxy = schema.HTTPReverseProxySchema(**arguments, **kept)
+
+    # Compare whole pipelines, current may lack tuning it couldn't read.
+    updated = pipeline.model_copy(deep=True)
+    set_pipeline_upstream(updated, http_reverse_proxy)
+    updated.data = {
+        **(pipeline.data or {}),
+        mcp_pipeline_data_key: route_metadata(http_reverse_proxy),
+    }
+    if updated != pipeline:
+        await egapis.update_pipeline(updated)
+
+    if current.port != http_reverse_proxy.port:
+        # Route on the new port before removing the old route, so the proxy
+        # stays reachable throughout the move.
+        await mount_http_reverse_proxies_on_port(
+            http_reverse_proxy.port, [http_reverse_proxy]
+        )
+        await unmount_http_reverse_proxy(current)
+    elif (
+        current.host != http_reverse_proxy.host
+        or current.path != http_reverse_proxy.path
+        or current.isPathPrefix != http_reverse_proxy.isPathPrefix
+    ):
+        await mount_http_reverse_proxies_on_port(
+            http_reverse_proxy.port, [http_reverse_proxy]
         )
-        await unmount_http_reverse_proxy(http_reverse_proxy)
 
 
-async def update_http_reverse_proxy(arguments: dict):
-    http_reverse_proxy = schema.HTTPReverseProxySchema(**arguments)
+def find_http_reverse_proxy(
+    snapshot: egapis.ObjectSnapshot, name: str, lenient: bool = False
+) -> schema.HTTPReverseProxySchema:
+    pipeline_name = mcp_pipeline_name_prefix + name
+    pipeline = snapshot.get_pipeline(pipeline_name)
+    if pipeline is None:
+        raise Exception(f"Proxy {name} not found")
+
+    routes = index_routes_by_backend(
+        snapshot.http_servers(mcp_http_server_name_prefix)
+    ).get(pipeline_name)
+    if not routes:
+        raise Exception(f"Proxy {name} not found")
+
+    http_server, rule, path = routes[0]
+    return to_http_reverse_proxy(
+        pipeline, http_server, rule, path, pipeline_endpoints(pipeline), lenient
+    )
+
+
+async def fetch_http_reverse_proxy(
+    name: str, use_cache: bool = True, lenient: bool = False
+) -> tuple[schema.HTTPReverseProxySchema, schema.Pipeline]:
+    """
+    Read one proxy with a pipeline GET and a GET of the HTTPServer named in
+    its route metadata. Proxies created before the metadata existed, or
+    whose route was moved behind our back, fall back to a full listing.
+    """
+    pipeline_name = mcp_pipeline_name_prefix + name
+    try:
+        pipeline = await egapis.get_pipeline(pipeline_name, use_cache)
+    except HTTPError as e:
+        if e.code == 404:
+            raise Exception(f"Proxy {name} not found")
+        raise
+
+    metadata = (pipeline.data or {}).get(mcp_pipeline_data_key)
+    if metadata is not None:
+        http_server_name = mcp_http_server_name_prefix + str(metadata["port"])
+        try:
+            http_server = await egapis.get_http_server(http_server_name, use_cache)
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+            http_server = None
+
+        if http_server is not None:
+            routes = index_routes_by_backend([http_server]).get(pipeline_name)
+            if routes:
+                http_server, rule, path = routes[0]
+                return (
+                    to_http_reverse_proxy(
+                        pipeline,
+                        http_server,
+                        rule,
+                        path,
+                        pipeline_endpoints(pipeline),
+                        lenient,
+                    ),
+                    pipeline,
+                )
 
-    await delete_http_reverse_proxy({"name": http_reverse_proxy.name})
-    await create_http_reverse_proxy(arguments)
-    return
-
-    # FIXME: Store pipeline info in pipeline itself to avoid
-    # complicated link logic between HTTPServer and Pipeline.
-
-    # pipeline = await egapis.get_pipeline(pipeline_name)
-    # for filter in pipeline.filters:
-    #     if filter["kind"] != "Proxy":
-    #         continue
-    #     filter["pools"] = [
-    #         {
-    #             "servers": [
-    #                 schema.PoolServer(url=url) for url in http_reverse_proxy.endpoints
-    #             ]
-    #         }
-    #     ]
-    # await egapis.update_pipeline(pipeline)
-    # await guarantee_http_server_exists(http_reverse_proxy.port)
-    # await mount_http_reverse_proxy(http_reverse_proxy)
+    snapshot = await egapis.get_object_snapshot(use_cache)
+    return find_http_reverse_proxy(snapshot, name, lenient), pipeline
 
 
 async def get_http_reverse_proxy(arguments: dict) -> schema.HTTPReverseProxySchema:
-    name = arguments["name"]
+    get_schema = schema.GetHTTPReverseProxySchema(**arguments)
+
+    if mirror_available():
+        snapshot = await mirror.snapshot(get_schema.refresh)
+        return find_http_reverse_proxy(snapshot, get_schema.name)
+
+    http_reverse_proxy, _ = await fetch_http_reverse_proxy(
+        get_schema.name, use_cache=not get_schema.refresh
+    )
+    return http_reverse_proxy
+
+
+async def optimize_http_server_routes(
+    arguments: dict,
+) -> schema.OptimizeHTTPServerRoutesResult:
+    optimize_schema = schema.OptimizeHTTPServerRoutesSchema(**arguments)
+    snapshot = await get_object_snapshot(refresh=True)
+    http_servers = [
+        http_server
+        for http_server in snapshot.http_servers(mcp_http_server_name_prefix)
+        if optimize_schema.port is None or http_server.port == optimize_schema.port
+    ]
+    if optimize_schema.port is not None and not http_servers:
+        raise Exception(f"No HTTPServer on port {optimize_schema.port}")
+
+    results = [
+        schema.HTTPServerRoutesResult(name=http_server.name, port=http_server.port)
+        for http_server in http_servers
+    ]
+
+    def optimize(result: schema.HTTPServerRoutesResult):
+        def mutate(http_server: schema.HTTPServer) -> bool:
+            result.rulesBefore = len(http_server.rules)
+            result.changed = routing.optimize_http_server(http_server)
+            result.rulesAfter = len(http_server.rules)
+            return result.changed
+
+        return mutate
+
+    if optimize_schema.dryRun:
+        for http_server, result in zip(http_servers, results):
+            optimize(result)(http_server.model_copy(deep=True))
+            result.success = True
+    else:
+        errors = await utils.gather_with_concurrency(
+            settings.EG_MAX_CONCURRENCY,
+            *[
+                get_mutation_queue(result.port).submit(optimize(result))
+                for result in results
+            ],
+        )
+        for result, error in zip(results, errors):
+            result.success = not isinstance(error, Exception)
+            if not result.success:
+                result.error = str(error)
+
+    return schema.OptimizeHTTPServerRoutesResult(
+        dryRun=optimize_schema.dryRun, items=results
+    )
+
+
+def to_http_server_settings(
+    http_server: schema.HTTPServer,
+) -> schema.HTTPServerSettingsResult:
+    return schema.HTTPServerSettingsResult(
+        name=http_server.name,
+        port=http_server.port,
+        **http_server.model_dump(include=set(schema.HTTPServerSettings.model_fields)),
+    )
+
+
+async def get_http_server_settings(
+    arguments: dict,
+) -> schema.HTTPServerSettingsResult:
+    get_schema = schema.GetHTTPServerSettingsSchema(**arguments)
+    name = mcp_http_server_name_prefix + str(get_schema.port)
+    try:
+        http_server = await egapis.get_http_server(
+            name, use_cache=not get_schema.refresh
+        )
+    except HTTPError as e:
+        if e.code == 404:
+            raise HTTPError(
+                e.url, e.code, f"No HTTPServer on port {get_schema.port}", None, None
+            )
+        raise
+    return to_http_server_settings(http_server)
+
+
+async def update_http_server_settings(
+    arguments: dict,
+) -> schema.HTTPServerSettingsResult:
+    """
+    Patch the given settings of the HTTPServer of a port, leaving its rules
+    and the other settings alone. Nothing is written when every setting
+    already has its value.
+    """
+    update_schema = schema.UpdateHTTPServerSettingsSchema(**arguments)
+    updates = update_schema.model_dump(
+        mode="json", include=set(schema.HTTPServerSettings.model_fields)
+    )
+    updates = {field: value for field, value in updates.items() if value is not None}
+    result = None
+
+    def mutate(http_server: schema.HTTPServer) -> bool:
+        nonlocal result
+        if not http_server.rules:
+            # MCP deletes the servers it leaves without rules.
+            raise Exception(f"No HTTPServer on port {update_schema.port}")
+        changed = []
+        for field, value in updates.items():
+            if getattr(http_server, field) != value:
+                setattr(http_server, field, value)
+                changed.append(field)
+        result = to_http_server_settings(http_server)
+        result.changed = changed
+        return bool(changed)
 
-    http_reverse_proxies = await list_http_reverse_proxies()
+    await get_mutation_queue(update_schema.port).submit(mutate)
+    return result
 
-    for http_reverse_proxy in http_reverse_proxies:
-        if http_reverse_proxy.name == name:
-            return http_reverse_proxy
 
-    raise Exception(f"Proxy {name} not found")
+# Route index of each snapshot still in use, so a mirror snapshot is only
+# indexed once however many lookups it serves.
+route_indexes: WeakKeyDictionary = WeakKeyDictionary()
+
+default_ports = {"http": 80, "https": 443}
+
+
+def get_route_index(snapshot: egapis.ObjectSnapshot) -> routing.RouteIndex:
+    index = route_indexes.get(snapshot)
+    if index is None:
+        index = routing.RouteIndex(snapshot.http_servers())
+        route_indexes[snapshot] = index
+    return index
+
+
+def to_route_match(entry: routing.RouteEntry) -> schema.RouteMatch:
+    backend = entry.path.backend
+    return schema.RouteMatch(
+        server=entry.server.name,
+        host=entry.rule.host,
+        path=entry.path.path,
+        pathPrefix=entry.path.pathPrefix,
+        pathRegexp=entry.path.pathRegexp,
+        backend=backend,
+        proxy=backend[len(mcp_pipeline_name_prefix) :]
+        if backend.startswith(mcp_pipeline_name_prefix)
+        else None,
+    )
+
+
+def to_route_resolution(request: schema.RouteRequest) -> schema.RouteResolution:
+    if request.url is None:
+        return schema.RouteResolution(
+            port=request.port,
+            host=request.host,
+            path=request.path or "/",
+            method=request.method,
+            error=None
+            if request.port is not None
+            else "Either url or port is required",
+        )
+
+    try:
+        url = urlsplit(request.url)
+        port = url.port or default_ports.get(url.scheme)
+    except ValueError as e:
+        return schema.RouteResolution(
+            method=request.method, error=f"Invalid url {request.url}: {e}"
+        )
+    return schema.RouteResolution(
+        port=port,
+        host=url.hostname or "",
+        path=url.path or "/",
+        method=request.method,
+        error=None
+        if port is not None and url.hostname
+        else f"Invalid url {request.url}",
+    )
+
+
+async def resolve_route(arguments: dict) -> schema.ResolveRouteResult:
+    resolve_schema = schema.ResolveRouteSchema(**arguments)
+    snapshot = await get_object_snapshot(resolve_schema.refresh)
+
+    endpoints_by_backend: Dict[str, list[str]] = {}
+
+    def backend_endpoints(backend: str) -> list[str]:
+        if backend not in endpoints_by_backend:
+            pipeline = snapshot.get_pipeline(backend)
+            endpoints_by_backend[backend] = (
+                pipeline_endpoints(pipeline) if pipeline is not None else []
+            )
+        return endpoints_by_backend[backend]
+
+    resolutions = []
+    with egapis.gc_paused():
+        index = get_route_index(snapshot)
+        for request in resolve_schema.requests:
+            resolution = to_route_resolution(request)
+            resolutions.append(resolution)
+            if resolution.error is not None:
+                continue
+
+            router_kind = index.router_kinds.get(resolution.port)
+            if router_kind is not None:
+                resolution.note = (
+                    f"The HTTPServer on port {resolution.port} uses the "
+                    f"{router_kind} router, resolved here with the Ordered "
+                    "router's precedence; the actual route may differ"
+                )
+
+            matches = index.match(
+                resolution.port, resolution.host, resolution.path, resolution.method
+            )
+            if not matches:
+                continue
+
+            winner, *shadowed = matches
+            resolution.route = to_route_match(winner)
+            resolution.endpoints = list(backend_endpoints(winner.path.backend))
+            for entry in shadowed:
+                match = to_route_match(entry)
+                match.conflict = (
+                    match.host == resolution.route.host
+                    and match.path == resolution.route.path
+                    and match.pathPrefix == resolution.route.pathPrefix
+                    and match.pathRegexp == resolution.route.pathRegexp
+                )
+                resolution.shadowed.append(match)
+
+    return schema.ResolveRouteResult(items=resolutions)
 
 
 # Let's Encrypt part.
@@ -309,3 +1296,19 @@ async def get_lets_encrypt(arguments: dict) -> schema.AutoCertManager:
             raise
 
     return auto_cert_manager
+
+
+# Server part.
+
+
+def get_server_stats(arguments: dict):
+    stats_schema = schema.GetServerStatsSchema(**arguments)
+    cache_stats = egapis.cache.stats()
+    if stats_schema.format == schema.GetServerStatsSchema.StatsFormatEnum.prometheus:
+        stats = metrics.to_prometheus(cache_stats)
+    else:
+        stats = metrics.stats(cache_stats)
+    if stats_schema.reset:
+        metrics.reset()
+        egapis.cache.hits = egapis.cache.misses = 0
+    return stats
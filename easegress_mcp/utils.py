@@ -1,9 +1,14 @@
+import asyncio
+import json
 import secrets
-from typing import Any, List
+from typing import Any, Awaitable, List, Optional
 
 from pydantic import BaseModel
 from mcp.types import TextContent
 
+from easegress_mcp import schema
+import settings
+
 
 def generate_name(prefix: str):
     token = secrets.token_hex(8)
@@ -11,7 +16,87 @@ def generate_name(prefix: str):
     return name
 
 
-def to_textcontent(model: Any) -> List[TextContent]:
+async def gather_with_concurrency(limit: int, *aws: Awaitable) -> list:
+    """
+    Like asyncio.gather with return_exceptions=True, but runs at most
+    `limit` awaitables at a time.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*[run(aw) for aw in aws], return_exceptions=True)
+
+
+def resolve_output_options(
+    options: Optional[schema.OutputOptions],
+) -> schema.OutputOptions:
+    options = options or schema.OutputOptions()
+    return schema.OutputOptions(
+        format=options.format or settings.EG_OUTPUT_FORMAT,
+        fields=options.fields,
+        excludeNone=options.excludeNone
+        if options.excludeNone is not None
+        else settings.EG_OUTPUT_EXCLUDE_NONE,
+        excludeDefaults=options.excludeDefaults
+        if options.excludeDefaults is not None
+        else settings.EG_OUTPUT_EXCLUDE_DEFAULTS,
+    )
+
+
+def dump_result(result: Any, options: schema.OutputOptions) -> Any:
+    if isinstance(result, BaseModel):
+        return dump_model(result, options)
+    if isinstance(result, list):
+        return [dump_result(item, options) for item in result]
+    return result
+
+
+def dump_cluster_result(
+    cluster_result: schema.ClusterResult, options: schema.OutputOptions
+) -> dict:
+    data = cluster_result.model_dump(
+        mode="json",
+        exclude={"result"},
+        exclude_none=options.excludeNone,
+        exclude_defaults=options.excludeDefaults,
+    )
+    result = dump_result(cluster_result.result, options)
+    if result is not None or not (options.excludeNone or options.excludeDefaults):
+        data["result"] = result
+    return data
+
+
+def dump_model(model: BaseModel, options: schema.OutputOptions) -> dict:
+    # Fields select what each cluster returned, not the per-cluster wrappers.
+    if isinstance(model, schema.ClusterResults):
+        return {"items": [dump_cluster_result(item, options) for item in model.items]}
+    include = set(options.fields) if options.fields else None
+    # Pages project their items rather than themselves.
+    if include is not None and "items" in type(model).model_fields:
+        include = {
+            "items": {"__all__": include},
+            **{name: True for name in type(model).model_fields if name != "items"},
+        }
+    return model.model_dump(
+        mode="json",
+        include=include,
+        exclude_none=options.excludeNone,
+        exclude_defaults=options.excludeDefaults,
+    )
+
+
+def dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def to_textcontent(
+    model: Any, options: Optional[schema.OutputOptions] = None
+) -> List[TextContent]:
+    options = resolve_output_options(options)
+
     if model is None:
         return [
             TextContent(
@@ -20,20 +105,17 @@ def to_textcontent(model: Any) -> List[TextContent]:
             )
         ]
     elif isinstance(model, list) and len(model) > 0 and isinstance(model[0], BaseModel):
-        return [
-            TextContent(
-                type="text",
-                text=item.model_dump_json(),
-            )
-            for item in model
-        ]
+        records = [dump_model(item, options) for item in model]
     elif isinstance(model, BaseModel):
-        return [
-            TextContent(
-                type="text",
-                text=model.model_dump_json(),
-            )
-        ]
+        data = dump_model(model, options)
+        if options.format == schema.OutputOptions.FormatEnum.json:
+            return [TextContent(type="text", text=dumps(data))]
+        # A page is emitted as its items followed by its cursor.
+        records = data.pop("items", None)
+        if records is None:
+            records = [data]
+        elif data:
+            records = records + [data]
     else:
         return [
             TextContent(
@@ -41,3 +123,10 @@ def to_textcontent(model: Any) -> List[TextContent]:
                 text=f"{model}",
             )
         ]
+
+    if options.format == schema.OutputOptions.FormatEnum.json:
+        return [TextContent(type="text", text=dumps(records))]
+    elif options.format == schema.OutputOptions.FormatEnum.ndjson:
+        return [TextContent(type="text", text="\n".join(dumps(r) for r in records))]
+    else:
+        return [TextContent(type="text", text=dumps(record)) for record in records]
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import httpx
+import pytest
+
+# The modules import settings as a top-level module, like the server does.
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+sys.path.append(os.path.join(root, "easegress_mcp"))
+sys.path.append(os.path.join(root, "benchmarks"))
+
+from easegress_mcp import client, egapis, tools  # noqa: E402
+from mock_admin import MockAdminAPI  # noqa: E402
+import settings  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def admin_api():
+    """An in-process admin API serving the default cluster."""
+    api = MockAdminAPI()
+    client._async_clients[settings.EG_DEFAULT_CLUSTER] = httpx.AsyncClient(
+        transport=api.transport()
+    )
+    egapis.cache.clear()
+    tools.mutation_queues.clear()
+    yield api
+    await client.close_async_client()
@@ -0,0 +1,117 @@
+import pytest
+
+from easegress_mcp import schema, tools
+
+Action = schema.HTTPReverseProxyPlanAction
+pytestmark = pytest.mark.anyio
+
+
+def proxy(name: str, port: int = 8080, **kwargs) -> dict:
+    return {
+        "name": name,
+        "port": port,
+        "path": f"/{name}",
+        "endpoints": ["http://10.0.0.1:8080"],
+        **kwargs,
+    }
+
+
+def actions(plan: schema.HTTPReverseProxyPlan) -> list[tuple]:
+    return [(item.name, item.action, item.port, item.fromPort) for item in plan.items]
+
+
+def break_settings(admin_api, name: str):
+    """Leave a headerHash pool without its key, as an edit outside MCP could."""
+    pipeline = admin_api.objects[tools.mcp_pipeline_name_prefix + name]
+    pipeline["filters"][0]["pools"][0]["loadBalance"] = {"policy": "headerHash"}
+
+
+def test_plan_against_unlisted_pipelines():
+    desired = [schema.HTTPReverseProxySchema(**proxy("a", port=81))]
+    items = tools.plan_http_reverse_proxies(
+        desired, [], prune=True, unlisted={"a": [80], "orphan": []}
+    )
+    assert [(item.name, item.action, item.port, item.fromPort) for item in items] == [
+        ("a", Action.updateEndpoints, 81, None),
+        ("a", Action.moveRoute, 81, 80),
+        ("orphan", Action.delete, None, None),
+    ]
+
+
+def test_plan_of_every_action():
+    current = [
+        schema.HTTPReverseProxySchema(**proxy(name, port=80))
+        for name in ("same", "tuned", "moved", "gone")
+    ]
+    desired = [
+        schema.HTTPReverseProxySchema(**proxy("same", port=80)),
+        schema.HTTPReverseProxySchema(**proxy("tuned", port=80, timeout="5s")),
+        schema.HTTPReverseProxySchema(**proxy("moved", port=81)),
+        schema.HTTPReverseProxySchema(**proxy("new", port=80)),
+    ]
+    items = tools.plan_http_reverse_proxies(desired, current, prune=False)
+    assert [(item.name, item.action) for item in items] == [
+        ("tuned", Action.updateEndpoints),
+        ("moved", Action.moveRoute),
+        ("new", Action.create),
+    ]
+    pruned = tools.plan_http_reverse_proxies(desired, current, prune=True)
+    assert [(item.name, item.action) for item in pruned[len(items) :]] == [
+        ("gone", Action.delete)
+    ]
+
+
+async def test_empty_prune_needs_confirmation(admin_api):
+    await tools.create_http_reverse_proxy(proxy("a"))
+    with pytest.raises(ValueError):
+        await tools.apply_http_reverse_proxies({"proxies": []})
+    await tools.apply_http_reverse_proxies({"proxies": [], "confirmDeleteAll": True})
+    assert admin_api.objects == {}
+
+
+async def test_prune_deletes_unreadable_and_unrouted_proxies(admin_api):
+    for name in "abc":
+        await tools.create_http_reverse_proxy(proxy(name))
+    break_settings(admin_api, "b")
+    await tools.create_pipeline(schema.HTTPReverseProxySchema(**proxy("d")))
+
+    plan = await tools.apply_http_reverse_proxies({"proxies": [proxy("a")]})
+    assert actions(plan) == [
+        ("c", Action.delete, 8080, None),
+        ("b", Action.delete, 8080, None),
+        ("d", Action.delete, None, None),
+    ]
+    assert all(item.success for item in plan.items)
+    assert len(plan.errors) == 1 and "Proxy b" in plan.errors[0]
+    assert sorted(admin_api.objects) == ["mcp_http_server_8080", "mcp_pipeline_a"]
+
+
+async def test_apply_converges_on_unrouted_and_unreadable_proxies(admin_api):
+    await tools.create_http_reverse_proxy(proxy("b", port=8081))
+    break_settings(admin_api, "b")
+    await tools.create_pipeline(schema.HTTPReverseProxySchema(**proxy("d")))
+    desired = [proxy("b"), proxy("d")]
+
+    plan = await tools.apply_http_reverse_proxies({"proxies": desired})
+    assert all(item.success for item in plan.items)
+    again = await tools.apply_http_reverse_proxies({"proxies": desired, "dryRun": True})
+    assert again.items == [] and again.errors is None
+    assert "mcp_http_server_8081" not in admin_api.objects
+
+
+async def test_apply_round_trips_the_listing(admin_api):
+    tuned = proxy(
+        "a",
+        loadBalance="headerHash",
+        headerHashKey="X-User",
+        timeout="5s",
+        retry={"maxAttempts": 2},
+        cache={"expiration": "30s"},
+        compression={"minLength": 512},
+    )
+    await tools.apply_http_reverse_proxies({"proxies": [tuned, proxy("b")]})
+    listed = await tools.list_http_reverse_proxies({"refresh": True})
+    plan = await tools.apply_http_reverse_proxies(
+        {"proxies": [item.model_dump() for item in listed], "dryRun": True}
+    )
+    assert plan.items == []
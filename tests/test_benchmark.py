@@ -0,0 +1,26 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+# Loaded by path, easegress_mcp/tools.py is importable as "tools" too.
+path = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "benchmarks", "tools.py"
+)
+spec = importlib.util.spec_from_file_location("benchmark_tools", path)
+benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark)
+
+
+@pytest.mark.anyio
+async def test_tools_stay_within_thresholds():
+    results = await benchmark.run([10], 0.0)
+    with open(benchmark.default_thresholds) as f:
+        thresholds = json.load(f)
+    assert [
+        f"{tool}: {by_size['10']['error']}"
+        for tool, by_size in results.items()
+        if by_size["10"]["error"]
+    ] == []
+    assert benchmark.check(results, thresholds) == []
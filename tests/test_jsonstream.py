@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from easegress_mcp import egapis, mirror
+from easegress_mcp.jsonstream import ArraySplitter
+
+items = [
+    {"kind": "HTTPServer", "name": "a", "rules": [{"paths": [{"path": "/"}]}]},
+    {"kind": "Pipeline", "name": "b]{", "note": 'quoted \\" [brackets] {braces}'},
+    [1, [2, {"x": "}"}]],
+    {"kind": "Other", "name": "c", "empty": {}, "list": []},
+]
+
+
+def split(body: bytes, chunk_size: int) -> list:
+    splitter = ArraySplitter()
+    raws = []
+    for start in range(0, len(body), chunk_size):
+        raws.extend(splitter.feed(body[start : start + chunk_size]))
+    return [json.loads(raw) for raw in raws]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 4096])
+def test_splits_elements_across_chunk_boundaries(chunk_size):
+    body = json.dumps(items, indent=1).encode()
+    assert split(body, chunk_size) == items
+
+
+def test_skips_top_level_scalars():
+    body = json.dumps([1, "[", {"a": 1}, None, ["b"], True]).encode()
+    assert split(body, 1) == [{"a": 1}, ["b"]]
+
+
+def test_drops_consumed_bytes():
+    splitter = ArraySplitter()
+    list(splitter.feed(b'[{"a": 1}, {"b": "' + b"x" * 1000))
+    list(splitter.feed(b'"}, '))
+    assert len(splitter._buffer) < 10
+
+
+@pytest.mark.anyio
+async def test_iter_objects_yields_only_the_given_kinds(admin_api):
+    admin_api.load([{**item, "name": str(i)} for i, item in enumerate(items[:2])])
+    admin_api.objects["other"] = {"kind": "Other", "name": "other"}
+    got = [item async for item in egapis.iter_objects(("Pipeline",))]
+    assert [item["name"] for item in got] == ["1"]
+
+
+@pytest.mark.anyio
+async def test_mirror_sync_streams_the_mirrored_kinds(admin_api):
+    admin_api.load(
+        [
+            {"kind": "HTTPServer", "name": "s", "port": 80, "rules": []},
+            {"kind": "Pipeline", "name": "p", "filters": []},
+            {"kind": "Other", "name": "o"},
+        ]
+    )
+    object_mirror = mirror.ObjectMirror(interval=60, max_staleness=60)
+    events = []
+    object_mirror.subscribe(events.extend)
+
+    snapshot = await object_mirror.snapshot()
+    assert [(event.type, event.name) for event in events] == [
+        ("added", "s"),
+        ("added", "p"),
+    ]
+    assert snapshot.objects("Other") == {}
+    assert list(snapshot.objects("Pipeline")) == ["p"]
+
+    del admin_api.objects["p"]
+    events.clear()
+    await object_mirror.snapshot(refresh=True)
+    assert [(event.type, event.name) for event in events] == [("deleted", "p")]
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from easegress_mcp import metrics, mutations, schema
+
+pytestmark = pytest.mark.anyio
+
+
+def add_rule(host: str):
+    def mutate(http_server: schema.HTTPServer):
+        http_server.rules.append(
+            schema.Rule(host=host, paths=[schema.Path(pathPrefix="/", backend=host)])
+        )
+
+    return mutate
+
+
+def tool_labels() -> set[tuple[str, str]]:
+    return {(tool, method) for _, tool, method, _ in metrics.metrics.admin_requests}
+
+
+async def test_queue_writes_are_not_credited_to_a_tool(admin_api):
+    metrics.metrics.reset()
+    queue = mutations.HTTPServerMutationQueue("s", 80, window=0.01)
+
+    async def call(tool: str, host: str):
+        with metrics.metrics.tool_call(tool):
+            await queue.submit(add_rule(host))
+
+    await asyncio.gather(call("first", "a.com"), call("second", "b.com"))
+    assert tool_labels() == {
+        (mutations.queue_tool_label, "GET"),
+        (mutations.queue_tool_label, "POST"),
+    }
+
+
+def calls(admin_api) -> list[str]:
+    return [method for method, _ in admin_api.stats.calls]
+
+
+async def test_concurrent_mutations_share_one_read_and_write(admin_api):
+    queue = mutations.HTTPServerMutationQueue("s", 80, window=0.01)
+    await asyncio.gather(*[queue.submit(add_rule(f"{i}.com")) for i in range(5)])
+    assert calls(admin_api) == ["GET", "POST"]
+    assert len(admin_api.objects["s"]["rules"]) == 5
+
+    admin_api.reset_stats()
+    await asyncio.gather(
+        queue.submit(add_rule("5.com")), queue.submit(add_rule("6.com"))
+    )
+    assert calls(admin_api) == ["GET", "PUT"]
+    assert len(admin_api.objects["s"]["rules"]) == 7
+
+
+async def test_unchanged_batch_is_not_written(admin_api):
+    queue = mutations.HTTPServerMutationQueue("s", 80, window=0)
+    await queue.submit(add_rule("a.com"))
+    admin_api.reset_stats()
+    await queue.submit(lambda http_server: False)
+    assert calls(admin_api) == ["GET"]
+
+
+async def test_server_left_without_rules_is_deleted(admin_api):
+    queue = mutations.HTTPServerMutationQueue("s", 80, window=0)
+    await queue.submit(add_rule("a.com"))
+
+    def clear(http_server: schema.HTTPServer):
+        http_server.rules = []
+
+    await queue.submit(clear)
+    assert "s" not in admin_api.objects
+
+
+async def test_failing_mutation_only_fails_its_submitter(admin_api):
+    queue = mutations.HTTPServerMutationQueue("s", 80, window=0.01)
+
+    def fail(http_server: schema.HTTPServer):
+        raise ValueError("bad rule")
+
+    results = await asyncio.gather(
+        queue.submit(add_rule("a.com")), queue.submit(fail), return_exceptions=True
+    )
+    assert results[0] is None
+    assert isinstance(results[1], ValueError)
+    assert [rule["host"] for rule in admin_api.objects["s"]["rules"]] == ["a.com"]
+
+
+async def test_failed_write_fails_the_whole_batch(admin_api):
+    queue = mutations.HTTPServerMutationQueue("s", 80, window=0.01)
+    admin_api.objects["s"] = {"name": "s", "kind": "Other"}
+    results = await asyncio.gather(
+        queue.submit(add_rule("a.com")),
+        queue.submit(add_rule("b.com")),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, Exception) for result in results)
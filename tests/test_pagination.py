@@ -0,0 +1,54 @@
+import pytest
+
+from easegress_mcp import tools
+from fleet import make_fleet
+
+pytestmark = pytest.mark.anyio
+
+
+async def pages(**arguments) -> list[list[str]]:
+    result = []
+    cursor = None
+    while True:
+        page = await tools.list_http_reverse_proxies_page(
+            {**arguments, "cursor": cursor}
+        )
+        result.append([(proxy.name, proxy.port) for proxy in page.items])
+        cursor = page.nextCursor
+        if cursor is None:
+            return result
+
+
+async def test_pages_cover_the_listing_once(admin_api):
+    admin_api.load(make_fleet(25, ports=3))
+    everything = [
+        (proxy.name, proxy.port) for proxy in await tools.list_http_reverse_proxies()
+    ]
+    assert len(everything) == 25
+
+    result = await pages(limit=10)
+    assert [len(page) for page in result] == [10, 10, 5]
+    assert [item for page in result for item in page] == everything
+
+
+async def test_pages_of_a_filtered_listing(admin_api):
+    admin_api.load(make_fleet(25, ports=3))
+    result = await pages(limit=4, port=10001)
+    items = [item for page in result for item in page]
+    assert len(items) == 8
+    assert {port for _, port in items} == {10001}
+    assert len(result[-1]) == 4
+
+
+async def test_page_without_limit_has_no_cursor(admin_api):
+    admin_api.load(make_fleet(5))
+    page = await tools.list_http_reverse_proxies_page({})
+    assert len(page.items) == 5
+    assert page.nextCursor is None
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    proxy = tools.schema.HTTPReverseProxySchema(name="a b", port=81)
+    assert tools.decode_cursor(tools.encode_cursor(proxy)) == ("a b", 81)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        tools.decode_cursor("not a cursor")
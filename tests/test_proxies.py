@@ -0,0 +1,66 @@
+from urllib.error import HTTPError
+
+import pytest
+
+from easegress_mcp import tools
+
+pytestmark = pytest.mark.anyio
+
+endpoints = ["http://10.0.0.1:8080", "http://10.0.0.2:8080"]
+
+
+async def create(**kwargs):
+    await tools.create_http_reverse_proxy(
+        {"name": "p", "port": 8080, "path": "/p", "endpoints": endpoints, **kwargs}
+    )
+
+
+async def get() -> dict:
+    proxy = await tools.get_http_reverse_proxy({"name": "p"})
+    return proxy.model_dump(exclude_none=True)
+
+
+async def test_update_of_the_header_hash_key_alone(admin_api):
+    await create(loadBalance="headerHash", headerHashKey="X-User")
+    await tools.update_http_reverse_proxy(
+        {"name": "p", "port": 8080, "endpoints": endpoints, "headerHashKey": "X-Id"}
+    )
+    proxy = await get()
+    assert (proxy["loadBalance"], proxy["headerHashKey"]) == ("headerHash", "X-Id")
+
+
+async def test_update_keeps_weights_of_remaining_endpoints(admin_api):
+    await create(weights={endpoints[0]: 3, endpoints[1]: 1})
+    await tools.update_http_reverse_proxy(
+        {"name": "p", "port": 8080, "endpoints": endpoints[:1]}
+    )
+    assert (await get())["weights"] == {endpoints[0]: 3}
+
+
+async def test_update_leaving_the_header_hash_policy(admin_api):
+    await create(loadBalance="headerHash", headerHashKey="X-User")
+    await tools.update_http_reverse_proxy(
+        {"name": "p", "port": 8080, "endpoints": endpoints, "loadBalance": "random"}
+    )
+    proxy = await get()
+    assert proxy["loadBalance"] == "random"
+    assert "headerHashKey" not in proxy
+
+
+async def test_delete_unmounts_before_deleting_the_pipeline(admin_api):
+    await create()
+    admin_api.reset_stats()
+    await tools.delete_http_reverse_proxy({"name": "p"})
+    writes = [call for call in admin_api.stats.calls if call[0] != "GET"]
+    assert writes == [
+        ("DELETE", "/apis/v1/objects/mcp_http_server_8080"),
+        ("DELETE", "/apis/v1/objects/mcp_pipeline_p"),
+    ]
+
+
+async def test_delete_of_a_missing_proxy(admin_api):
+    admin_api.reset_stats()
+    with pytest.raises(HTTPError, match="Proxy q not found") as e:
+        await tools.delete_http_reverse_proxy({"name": "q"})
+    assert e.value.code == 404
+    assert [call[0] for call in admin_api.stats.calls] == ["GET"]
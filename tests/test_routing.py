@@ -0,0 +1,153 @@
+import pytest
+
+from easegress_mcp import routing, schema, tools
+from easegress_mcp.schema import Host, Path, Rule
+
+
+def winners(rules: list[Rule], requests: list[tuple[str, str]]) -> list:
+    index = routing.RouteIndex(
+        [
+            schema.HTTPServer(
+                name="s", port=80, rules=[r.model_copy(deep=True) for r in rules]
+            )
+        ]
+    )
+    result = []
+    for host, path in requests:
+        matches = index.match(80, host, path)
+        result.append(matches[0].path.backend if matches else None)
+    return result
+
+
+def optimized(rules: list[Rule]) -> list[Rule]:
+    return routing.optimize_rules([rule.model_copy(deep=True) for rule in rules])
+
+
+def test_constrained_rule_keeps_its_position():
+    rules = [
+        Rule(host="x.com", paths=[Path(path="/a", backend="A")]),
+        Rule(hostRegexp=r"^x\.com$", paths=[Path(pathPrefix="/", backend="B")]),
+        Rule(host="x.com", paths=[Path(path="/c", backend="C")]),
+    ]
+    after = optimized(rules)
+    assert [rule.hostRegexp for rule in after] == [None, r"^x\.com$", None]
+    requests = [("x.com", "/a"), ("x.com", "/c"), ("x.com", "/z")]
+    assert winners(after, requests) == winners(rules, requests) == ["A", "B", "B"]
+
+
+def test_merges_runs_of_plain_rules_by_host():
+    rules = [
+        Rule(host="a.com", paths=[Path(pathPrefix="/", backend="A1")]),
+        Rule(host="b.com", paths=[Path(path="/b", backend="B1")]),
+        Rule(host="a.com", paths=[Path(pathPrefix="/long/", backend="A2")]),
+        Rule(host="", paths=[Path(pathPrefix="/", backend="ANY")]),
+        Rule(host="b.com", paths=[Path(path="/b2", backend="B2")]),
+    ]
+    after = optimized(rules)
+    assert [rule.host for rule in after] == ["a.com", "b.com", ""]
+    assert [path.backend for path in after[0].paths] == ["A2", "A1"]
+
+
+def test_regexp_paths_are_not_shadowed_by_merging():
+    rules = [
+        Rule(
+            host="a",
+            paths=[
+                Path(pathRegexp="^/v[0-9]+/", backend="R"),
+                Path(pathPrefix="/x", backend="X"),
+            ],
+        ),
+        Rule(host="a", paths=[Path(pathPrefix="/", backend="ROOT")]),
+    ]
+    requests = [("a", "/v2/y"), ("a", "/x"), ("a", "/other")]
+    assert winners(optimized(rules), requests) == winners(rules, requests)
+
+
+def test_same_winners_apart_from_unshadowing():
+    rules = [
+        Rule(host="api.com", paths=[Path(pathPrefix="/", backend="api-root")]),
+        Rule(
+            hosts=[Host(value="api.com"), Host(value="^www\\.", isRegexp=True)],
+            paths=[Path(pathPrefix="/legacy", backend="legacy")],
+        ),
+        Rule(host="api.com", paths=[Path(pathPrefix="/users", backend="users")]),
+        Rule(host="", paths=[Path(pathPrefix="/", backend="default")]),
+        Rule(host="web.com", paths=[Path(path="/", backend="web")]),
+        Rule(
+            host="api.com",
+            paths=[
+                Path(pathRegexp="^/v[0-9]+$", backend="versions"),
+                Path(path="/health", backend="health"),
+            ],
+        ),
+        Rule(
+            ipFilter={"allowIPs": ["10.0.0.0/8"]},
+            paths=[Path(pathPrefix="/", backend="internal")],
+        ),
+    ]
+    requests = [
+        ("api.com", "/users/1"),
+        ("api.com", "/legacy/x"),
+        ("api.com", "/v1"),
+        ("api.com", "/health"),
+        ("www.example.com", "/legacy"),
+        ("web.com", "/"),
+        ("web.com", "/page"),
+        ("other.com", "/"),
+    ]
+    before = dict(zip(requests, winners(rules, requests)))
+    after = dict(zip(requests, winners(optimized(rules), requests)))
+    changed = {request for request in requests if before[request] != after[request]}
+    # Only web.com, shadowed by the catch-all host of its run, changes. The
+    # users prefix stays behind api-root: the legacy rule between them
+    # keeps the two runs apart.
+    assert changed == {("web.com", "/")}
+    assert after[("web.com", "/")] == "web"
+    assert before[("api.com", "/users/1")] == "api-root"
+    assert after[("api.com", "/users/1")] == "api-root"
+
+
+@pytest.mark.anyio
+async def test_resolutions_note_servers_using_another_router(admin_api):
+    rules = [{"host": "x.com", "paths": [{"pathPrefix": "/", "backend": "A"}]}]
+    admin_api.load(
+        [
+            {"kind": "HTTPServer", "name": "o", "port": 80, "rules": rules},
+            {
+                "kind": "HTTPServer",
+                "name": "r",
+                "port": 81,
+                "routerKind": "RadixTree",
+                "rules": rules,
+            },
+        ]
+    )
+    result = await tools.resolve_route(
+        {"requests": [{"url": "http://x.com/a"}, {"url": "http://x.com:81/a"}]}
+    )
+    assert [item.route.server for item in result.items] == ["o", "r"]
+    assert result.items[0].note is None
+    assert "RadixTree" in result.items[1].note
+
+
+def trie_matches(paths: list[Path], request: str) -> list[str]:
+    trie = routing.PathTrie()
+    rule = Rule(paths=paths)
+    server = schema.HTTPServer(name="s", port=80, rules=[rule])
+    for i, path in enumerate(paths):
+        trie.add(routing.RouteEntry((0, 0, i), server, rule, path))
+    return sorted(entry.path.backend for entry in trie.match(request))
+
+
+def test_path_trie_matches_exact_prefix_and_regexp_paths():
+    paths = [
+        Path(path="/a/b", backend="exact"),
+        Path(pathPrefix="/a", backend="prefix"),
+        Path(pathPrefix="/a/b/", backend="longer prefix"),
+        Path(pathRegexp=r"^/a/\d+$", backend="regexp"),
+        Path(backend="any"),
+    ]
+    assert trie_matches(paths, "/a/b") == ["any", "exact", "prefix"]
+    assert trie_matches(paths, "/a/b/c") == ["any", "longer prefix", "prefix"]
+    assert trie_matches(paths, "/a/1") == ["any", "prefix", "regexp"]
+    assert trie_matches(paths, "/b") == ["any"]